@@ -8,6 +8,7 @@ from aws_cdk import (
     aws_lex as lex,
     aws_cloudfront_origins as origins,
     aws_dynamodb as dynamodb,
+    aws_lambda_event_sources as event_sources,
     CfnOutput,
     App,
     Environment,
@@ -15,11 +16,14 @@ from aws_cdk import (
     custom_resources as cr,
     CfnOutput,
     aws_s3_deployment as s3_deployment,
-    aws_cognito as cognito
+    aws_cognito as cognito,
+    Duration,
+    Size
 )
 
 from .lex_bot import create_lex_bot
 from constructs import Construct
+import json
 import os
 from dotenv import load_dotenv
 
@@ -30,18 +34,70 @@ class AwsLexChatbotStack(Stack):
         super().__init__(scope, id, **kwargs)
 
         # DynamoDB Tables
+        # Keys are prefixed "<tenant>#" and every item carries tenant_id;
+        # per-tenant reads go through the TenantIndex (rooms, staff) and
+        # TenantDateIndex (bookings) GSIs
+        default_tenant = os.getenv("DEFAULT_TENANT", "default")
+
+        # Offices served by this deployment. Each gets its own API key (HTTP)
+        # and bot alias (Lex); the website is configured for SITE_TENANT
+        tenants = list(dict.fromkeys(
+            [default_tenant] + [t.strip().lower() for t in os.getenv("TENANTS", "").split(",") if t.strip()]
+        ))
+        site_tenant = os.getenv("SITE_TENANT", default_tenant)
+
         bookings_table = dynamodb.Table(self, "BookingsTable",
-            partition_key=dynamodb.Attribute(name="id", type=dynamodb.AttributeType.STRING)
+            partition_key=dynamodb.Attribute(name="id", type=dynamodb.AttributeType.STRING),
+            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES
+        )
+
+        # "<tenant>#<date>" (sharded further for very busy rooms), sorted by start time.
+        # Bookings have no TenantIndex: it would put every booking write of an
+        # office on one index partition, so listings read a range of dates instead
+        bookings_table.add_global_secondary_index(
+            index_name="TenantDateIndex",
+            partition_key=dynamodb.Attribute(name="tenant_date", type=dynamodb.AttributeType.STRING),
+            sort_key=dynamodb.Attribute(name="start_time", type=dynamodb.AttributeType.STRING)
         )
 
         rooms_table = dynamodb.Table(self, "RoomsTable",
             partition_key=dynamodb.Attribute(name="room_id", type=dynamodb.AttributeType.STRING)
         )
 
+        rooms_table.add_global_secondary_index(
+            index_name="TenantIndex",
+            partition_key=dynamodb.Attribute(name="tenant_id", type=dynamodb.AttributeType.STRING)
+        )
+
         staff_table = dynamodb.Table(self, "StaffTable",
             partition_key=dynamodb.Attribute(name="staff_id", type=dynamodb.AttributeType.STRING)
         )
 
+        staff_table.add_global_secondary_index(
+            index_name="TenantIndex",
+            partition_key=dynamodb.Attribute(name="tenant_id", type=dynamodb.AttributeType.STRING)
+        )
+
+        # Idempotency keys for booking requests, expired by DynamoDB TTL
+        dedup_table = dynamodb.Table(self, "DedupTable",
+            partition_key=dynamodb.Attribute(name="idempotency_key", type=dynamodb.AttributeType.STRING),
+            time_to_live_attribute="expires_at"
+        )
+
+        # Waiters for a booked room and date, sorted by priority then arrival
+        waitlist_table = dynamodb.Table(self, "WaitlistTable",
+            partition_key=dynamodb.Attribute(name="slot_key", type=dynamodb.AttributeType.STRING),
+            sort_key=dynamodb.Attribute(name="waiter_key", type=dynamodb.AttributeType.STRING),
+            time_to_live_attribute="expires_at"
+        )
+
+        # Bookings per room and date, written in the same transaction as each
+        # booking so concurrent requests can't double-book a room; expired by TTL
+        schedule_table = dynamodb.Table(self, "ScheduleTable",
+            partition_key=dynamodb.Attribute(name="room_day", type=dynamodb.AttributeType.STRING),
+            time_to_live_attribute="expires_at"
+        )
+
         # IAM Role for Lex Bot
         lex_role = iam.Role(self, "LexRole",
             assumed_by=iam.ServicePrincipal("lex.amazonaws.com"),
@@ -59,6 +115,10 @@ class AwsLexChatbotStack(Stack):
         ))
 
 
+        # Booking rules JSON (opening hours, durations, buffers); see lambda/booking_policy.py.
+        # Both the booking Lambda and the waitlist matcher enforce them
+        booking_policy = os.getenv("BOOKING_POLICY", "{}")
+
         # Unified Lambda function for all Lex intents
         unified_lambda = _lambda.Function(self, "UnifiedLambda",
             runtime=_lambda.Runtime.PYTHON_3_9,
@@ -67,7 +127,16 @@ class AwsLexChatbotStack(Stack):
             environment={
                 "BOOKINGS_TABLE": bookings_table.table_name,
                 "ROOMS_TABLE": rooms_table.table_name,
-                "STAFF_TABLE": staff_table.table_name
+                "STAFF_TABLE": staff_table.table_name,
+                "DEDUP_TABLE": dedup_table.table_name,
+                "WAITLIST_TABLE": waitlist_table.table_name,
+                "SCHEDULE_TABLE": schedule_table.table_name,
+                "BOOKING_POLICY": booking_policy,
+                "DEFAULT_TENANT": default_tenant,
+                "TENANTS": ",".join(tenants),
+                # Per-tenant request rate/burst per container (0 disables)
+                "TENANT_RATE": os.getenv("TENANT_RATE", "20"),
+                "TENANT_BURST": os.getenv("TENANT_BURST", "40")
             }
         )
 
@@ -79,10 +148,58 @@ class AwsLexChatbotStack(Stack):
         bookings_table.grant_read_write_data(unified_lambda)
         rooms_table.grant_read_write_data(unified_lambda)
         staff_table.grant_read_write_data(unified_lambda)
+        dedup_table.grant_read_write_data(unified_lambda)
+        waitlist_table.grant_read_write_data(unified_lambda)
+        schedule_table.grant_read_write_data(unified_lambda)
+
+        # Promotes waiters when a booking is cancelled or shortened
+        waitlist_lambda = _lambda.Function(self, "WaitlistMatcherLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="waitlist_matcher.lambda_handler",
+            code=_lambda.Code.from_asset("lambda"),
+            timeout=Duration.seconds(60),
+            environment={
+                "BOOKINGS_TABLE": bookings_table.table_name,
+                "ROOMS_TABLE": rooms_table.table_name,
+                "STAFF_TABLE": staff_table.table_name,
+                "DEDUP_TABLE": dedup_table.table_name,
+                "WAITLIST_TABLE": waitlist_table.table_name,
+                "SCHEDULE_TABLE": schedule_table.table_name,
+                "BOOKING_POLICY": booking_policy,
+                "MAX_SLOTS_PER_BATCH": "25",
+                "DEFAULT_TENANT": default_tenant,
+                "TENANTS": ",".join(tenants)
+            }
+        )
+
+        bookings_table.grant_read_write_data(waitlist_lambda)
+        waitlist_table.grant_read_write_data(waitlist_lambda)
+        schedule_table.grant_read_write_data(waitlist_lambda)
+        # Room directory (write shards) for the tenant's booking partitions
+        rooms_table.grant_read_data(waitlist_lambda)
+
+        # Only removals and modifications can free a slot; one record frees at
+        # most one room-date, so batch_size also bounds the work per invocation.
+        # The matcher reports unprocessed room-dates as batch item failures
+        waitlist_lambda.add_event_source(event_sources.DynamoEventSource(bookings_table,
+            starting_position=_lambda.StartingPosition.LATEST,
+            batch_size=25,
+            max_batching_window=Duration.seconds(5),
+            retry_attempts=3,
+            bisect_batch_on_error=True,
+            report_batch_item_failures=True,
+            filters=[_lambda.FilterCriteria.filter({
+                "eventName": _lambda.FilterRule.or_("REMOVE", "MODIFY")
+            })]
+        ))
 
 
         # Define the Lex Bot with a Lambda function for all intents
-        lex_bot, lex_alias = create_lex_bot(self, lex_role, unified_lambda_arn=unified_lambda.function_arn)
+        lex_bot, lex_alias, tenant_aliases = create_lex_bot(
+            self, lex_role, unified_lambda_arn=unified_lambda.function_arn,
+            tenant_aliases=[t for t in tenants if t != default_tenant]
+        )
+        site_alias = tenant_aliases.get(site_tenant, lex_alias)
 
         lex_role.add_to_policy(iam.PolicyStatement(
             effect=iam.Effect.ALLOW,
@@ -135,7 +252,8 @@ class AwsLexChatbotStack(Stack):
             environment={
                 "BOOKINGS_TABLE": bookings_table.table_name,
                 "ROOMS_TABLE": rooms_table.table_name,
-                "STAFF_TABLE": staff_table.table_name
+                "STAFF_TABLE": staff_table.table_name,
+                "DEFAULT_TENANT": default_tenant
             }
         )
 
@@ -166,20 +284,58 @@ class AwsLexChatbotStack(Stack):
         booking_api = apigateway.LambdaRestApi(self, "BookingAPI",
             handler=unified_lambda,
             proxy=True,
+            # gzip/deflate responses above 1 KiB when the client sends Accept-Encoding
+            min_compression_size=Size.kibibytes(1),
+            binary_media_types=["application/msgpack"],
             default_cors_preflight_options=apigateway.CorsOptions(
                 allow_origins=apigateway.Cors.ALL_ORIGINS,
-                allow_methods=["GET","OPTIONS"],
-                allow_headers=["Content-Type"]
+                allow_methods=["GET","POST","OPTIONS"],
+                allow_headers=["Content-Type","Accept","Idempotency-Key","X-Api-Key"]
             )
         )
 
         # For adding bookings via chatbot
         booking_resource = booking_api.root.add_resource("book")
-        booking_resource.add_method("POST")
+        booking_resource.add_method("POST", api_key_required=True)
         
         # GET list of /bookings in the frontend
         bookings_list = booking_api.root.add_resource("bookings")
-        bookings_list.add_method("GET")  # uses unified_lambda by default
+        bookings_list.add_method("GET", api_key_required=True)  # uses unified_lambda by default
+
+        # One API key per office: the key decides the tenant of a request, and
+        # its usage plan throttles that office across all Lambda containers
+        tenant_rate = float(os.getenv("TENANT_RATE", "20"))
+        tenant_throttle = apigateway.ThrottleSettings(
+            rate_limit=tenant_rate,
+            burst_limit=int(float(os.getenv("TENANT_BURST", "40")))
+        ) if tenant_rate else None
+        tenant_keys = {}
+        for tenant in tenants:
+            tenant_keys[tenant] = apigateway.ApiKey(self, f"ApiKey-{tenant}",
+                api_key_name=f"{self.stack_name}-{tenant}"
+            )
+            usage_plan = booking_api.add_usage_plan(f"UsagePlan-{tenant}",
+                name=f"{self.stack_name}-{tenant}",
+                throttle=tenant_throttle,
+                api_stages=[apigateway.UsagePlanPerApiStage(api=booking_api, stage=booking_api.deployment_stage)]
+            )
+            usage_plan.add_api_key(tenant_keys[tenant])
+
+        unified_lambda.add_environment("TENANT_API_KEYS",
+            self.to_json_string({tenant: key.key_id for tenant, key in tenant_keys.items()})
+        )
+
+        # The website's key value goes into its config.json
+        site_key = tenant_keys.get(site_tenant, tenant_keys[default_tenant])
+        site_key_value = cr.AwsCustomResource(self, "SiteApiKeyValue",
+            on_update=cr.AwsSdkCall(
+                service="APIGateway",
+                action="getApiKey",
+                parameters={"apiKey": site_key.key_id, "includeValue": True},
+                physical_resource_id=cr.PhysicalResourceId.of(site_key.key_id)
+            ),
+            policy=cr.AwsCustomResourcePolicy.from_sdk_calls(resources=[site_key.key_arn])
+        )
 
 
         # API Gateway for checking availability
@@ -191,12 +347,72 @@ class AwsLexChatbotStack(Stack):
         availability_resource = availability_api.root.add_resource("check-availability")
         availability_resource.add_method("GET")
 
+        # Bucket holding admin import files and table exports
+        admin_bucket = s3.Bucket(self, "AdminDataBucket",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL
+        )
+
+        # Lambda function for bulk import/export of the tables
+        admin_lambda = _lambda.Function(self, "AdminImportExportLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="admin_io.lambda_handler",
+            code=_lambda.Code.from_asset("lambda"),
+            timeout=Duration.minutes(15),
+            memory_size=1024,
+            environment={
+                "BOOKINGS_TABLE": bookings_table.table_name,
+                "ROOMS_TABLE": rooms_table.table_name,
+                "STAFF_TABLE": staff_table.table_name,
+                "ADMIN_BUCKET": admin_bucket.bucket_name,
+                "DEFAULT_TENANT": default_tenant
+            }
+        )
+
+        bookings_table.grant_read_write_data(admin_lambda)
+        rooms_table.grant_read_write_data(admin_lambda)
+        staff_table.grant_read_write_data(admin_lambda)
+        admin_bucket.grant_read_write(admin_lambda)
+
+        # Gives data written before multi-tenancy to DEFAULT_TENANT. Runs once when
+        # this resource is created (the upgrade deploy); safe to re-run by invoking
+        # the admin function with {"action": "migrate"}
+        cr.AwsCustomResource(self, "TenancyMigrationTrigger",
+            on_create=cr.AwsSdkCall(
+                service="Lambda",
+                action="invoke",
+                parameters={
+                    "FunctionName": admin_lambda.function_name,
+                    "InvocationType": "Event",
+                    "Payload": json.dumps({"action": "migrate", "tenant": default_tenant})
+                },
+                physical_resource_id=cr.PhysicalResourceId.of("TenancyMigrationRun")
+            ),
+            policy=cr.AwsCustomResourcePolicy.from_statements([
+                iam.PolicyStatement(
+                    actions=["lambda:InvokeFunction"],
+                    resources=[admin_lambda.function_arn]
+                )
+            ])
+        )
+
+        # Admin endpoints are IAM-authorized; long syncs should invoke the Lambda directly
+        admin_integration = apigateway.LambdaIntegration(admin_lambda)
+        admin_resource = booking_api.root.add_resource("admin")
+        admin_resource.add_resource("import").add_method("POST", admin_integration,
+            authorization_type=apigateway.AuthorizationType.IAM
+        )
+        admin_resource.add_resource("export").add_method("GET", admin_integration,
+            authorization_type=apigateway.AuthorizationType.IAM
+        )
+
         CfnOutput(self, "WebsiteURL", value=f"https://{cloudfront_dist.domain_name}")
         CfnOutput(self, "REACT_APP_BOOKING_API", value=booking_api.url)
         CfnOutput(self, "REACT_APP_AVAILABILITY_API", value=availability_api.url)
         CfnOutput(self, "REACT_APP_LEX_BOT_ARN", value=lex_bot.attr_arn)
         CfnOutput(self, "REACTAPPLEXBOTNAME", value=lex_bot.name)
         CfnOutput(self, "REACTAPPLEXBOTREGION", value=self.region)
+        CfnOutput(self, "AdminDataBucketName", value=admin_bucket.bucket_name)
+        CfnOutput(self, "AdminImportExportFunction", value=admin_lambda.function_name)
 
         # Identity Pool for unauthenticated (guest) users
         identity_pool = cognito.CfnIdentityPool(self, "ChatbotIdentityPool",
@@ -218,14 +434,15 @@ class AwsLexChatbotStack(Stack):
             )
         )
 
-        # Allow Lex access from unauthenticated users
+        # Allow Lex access from unauthenticated users, through the website's alias only;
+        # other offices' aliases are for principals granted access explicitly
         unauth_role.add_to_policy(iam.PolicyStatement(
             actions=[
                 "lex:RecognizeText",
                 "lex:RecognizeUtterance"
             ],
             resources=[
-                f"arn:aws:lex:{self.region}:{self.account}:bot-alias/{lex_bot.ref}*"
+                f"arn:aws:lex:{self.region}:{self.account}:bot-alias/{lex_bot.ref}/{site_alias.attr_bot_alias_id}"
             ]
         ))
 
@@ -252,10 +469,11 @@ class AwsLexChatbotStack(Stack):
                     "lexBotArn":          lex_bot.attr_arn,
                     "lexBotName":         lex_bot.name,
                     "lexBotId":           lex_bot.ref,
-                    "lexBotAliasId":      lex_alias.ref,
+                    "lexBotAliasId":      site_alias.ref,
                     "lexBotRegion":       self.region,
                     "lexBotLocaleId":     "en_US",
-                    "identityPoolId":     identity_pool.ref
+                    "identityPoolId":     identity_pool.ref,
+                    "apiKey":             site_key_value.get_response_field("value")
                 })
             ],
             destination_bucket=website_bucket,
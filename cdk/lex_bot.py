@@ -4,7 +4,7 @@ from aws_cdk import aws_iam as iam
 from aws_cdk import CfnOutput
 from constructs import Construct
 
-def create_lex_bot(scope: Construct, lex_role: iam.Role, unified_lambda_arn: str) -> lex.CfnBot:
+def create_lex_bot(scope: Construct, lex_role: iam.Role, unified_lambda_arn: str, tenant_aliases=()) -> lex.CfnBot:
     lex_bot = lex.CfnBot(scope, "LexChatBot",
         name="MeetingBookingBot",
         role_arn=lex_role.role_arn,
@@ -13,6 +13,30 @@ def create_lex_bot(scope: Construct, lex_role: iam.Role, unified_lambda_arn: str
         bot_locales=[lex.CfnBot.BotLocaleProperty(
             locale_id="en_US",
             nlu_confidence_threshold=0.4,
+            slot_types=[
+                lex.CfnBot.SlotTypeProperty(
+                    name="EquipmentType",
+                    value_selection_setting=lex.CfnBot.SlotValueSelectionSettingProperty(
+                        resolution_strategy="TOP_RESOLUTION"
+                    ),
+                    slot_type_values=[
+                        lex.CfnBot.SlotTypeValueProperty(
+                            sample_value=lex.CfnBot.SampleValueProperty(value="projector"),
+                            synonyms=[lex.CfnBot.SampleValueProperty(value="screen")]
+                        ),
+                        lex.CfnBot.SlotTypeValueProperty(
+                            sample_value=lex.CfnBot.SampleValueProperty(value="video conferencing"),
+                            synonyms=[
+                                lex.CfnBot.SampleValueProperty(value="video call"),
+                                lex.CfnBot.SampleValueProperty(value="camera")
+                            ]
+                        ),
+                        lex.CfnBot.SlotTypeValueProperty(
+                            sample_value=lex.CfnBot.SampleValueProperty(value="whiteboard")
+                        ),
+                    ]
+                )
+            ],
             intents=[
                 lex.CfnBot.IntentProperty(
                     name="BookMeeting",
@@ -24,6 +48,11 @@ def create_lex_bot(scope: Construct, lex_role: iam.Role, unified_lambda_arn: str
                         lex.CfnBot.SampleUtteranceProperty(utterance="I want to book a meeting"),
                         lex.CfnBot.SampleUtteranceProperty(utterance="Schedule a meeting for me"),
                         lex.CfnBot.SampleUtteranceProperty(utterance="Book a room for a meeting"),
+                        lex.CfnBot.SampleUtteranceProperty(utterance="Book {Room} for a meeting"),
+                        lex.CfnBot.SampleUtteranceProperty(utterance="Book a room with a {Equipment}"),
+                        lex.CfnBot.SampleUtteranceProperty(utterance="Book a room in {Building}"),
+                        lex.CfnBot.SampleUtteranceProperty(utterance="Book a room on floor {Floor}"),
+                        lex.CfnBot.SampleUtteranceProperty(utterance="Book a room in {Building} on floor {Floor}"),
                     ],
                     slot_priorities=[  
                         lex.CfnBot.SlotPriorityProperty(
@@ -46,6 +75,18 @@ def create_lex_bot(scope: Construct, lex_role: iam.Role, unified_lambda_arn: str
                             priority=5,
                             slot_name="Attendees"
                         ),
+                        lex.CfnBot.SlotPriorityProperty(
+                            priority=6,
+                            slot_name="Equipment"
+                        ),
+                        lex.CfnBot.SlotPriorityProperty(
+                            priority=7,
+                            slot_name="Building"
+                        ),
+                        lex.CfnBot.SlotPriorityProperty(
+                            priority=8,
+                            slot_name="Floor"
+                        ),
                     ],
                     slots=[
                         lex.CfnBot.SlotProperty(
@@ -109,7 +150,7 @@ def create_lex_bot(scope: Construct, lex_role: iam.Role, unified_lambda_arn: str
                             name="Room",
                             slot_type_name="AMAZON.AlphaNumeric",
                             value_elicitation_setting=lex.CfnBot.SlotValueElicitationSettingProperty(
-                                slot_constraint="Required",
+                                slot_constraint="Optional",
                                 prompt_specification=lex.CfnBot.PromptSpecificationProperty(
                                     message_groups_list=[
                                         lex.CfnBot.MessageGroupProperty(
@@ -143,6 +184,63 @@ def create_lex_bot(scope: Construct, lex_role: iam.Role, unified_lambda_arn: str
                                 )
                             )
                         ),
+                        lex.CfnBot.SlotProperty(
+                            name="Equipment",
+                            slot_type_name="EquipmentType",
+                            value_elicitation_setting=lex.CfnBot.SlotValueElicitationSettingProperty(
+                                slot_constraint="Optional",
+                                prompt_specification=lex.CfnBot.PromptSpecificationProperty(
+                                    message_groups_list=[
+                                        lex.CfnBot.MessageGroupProperty(
+                                            message=lex.CfnBot.MessageProperty(
+                                                plain_text_message=lex.CfnBot.PlainTextMessageProperty(
+                                                    value="Does the room need any equipment?"
+                                                )
+                                            )
+                                        )
+                                    ],
+                                    max_retries=2
+                                )
+                            )
+                        ),
+                        lex.CfnBot.SlotProperty(
+                            name="Building",
+                            slot_type_name="AMAZON.AlphaNumeric",
+                            value_elicitation_setting=lex.CfnBot.SlotValueElicitationSettingProperty(
+                                slot_constraint="Optional",
+                                prompt_specification=lex.CfnBot.PromptSpecificationProperty(
+                                    message_groups_list=[
+                                        lex.CfnBot.MessageGroupProperty(
+                                            message=lex.CfnBot.MessageProperty(
+                                                plain_text_message=lex.CfnBot.PlainTextMessageProperty(
+                                                    value="Which building should the room be in?"
+                                                )
+                                            )
+                                        )
+                                    ],
+                                    max_retries=2
+                                )
+                            )
+                        ),
+                        lex.CfnBot.SlotProperty(
+                            name="Floor",
+                            slot_type_name="AMAZON.Number",
+                            value_elicitation_setting=lex.CfnBot.SlotValueElicitationSettingProperty(
+                                slot_constraint="Optional",
+                                prompt_specification=lex.CfnBot.PromptSpecificationProperty(
+                                    message_groups_list=[
+                                        lex.CfnBot.MessageGroupProperty(
+                                            message=lex.CfnBot.MessageProperty(
+                                                plain_text_message=lex.CfnBot.PlainTextMessageProperty(
+                                                    value="Which floor should the room be on?"
+                                                )
+                                            )
+                                        )
+                                    ],
+                                    max_retries=2
+                                )
+                            )
+                        ),
                     ]
                 ),
                 lex.CfnBot.IntentProperty(
@@ -263,29 +361,37 @@ def create_lex_bot(scope: Construct, lex_role: iam.Role, unified_lambda_arn: str
         ]
     )
 
-    # Create an explicit alias for Lex V2
-    lex_alias = lex.CfnBotAlias(
-        scope,
-        "LexChatBotAlias",
-        bot_alias_name="Prod",                           
-        bot_id=lex_bot.ref,          
-        bot_version=bot_version.attr_bot_version,              
-        bot_alias_locale_settings=[
-            lex.CfnBotAlias.BotAliasLocaleSettingsItemProperty(
-                locale_id="en_US",
-                bot_alias_locale_setting=lex.CfnBotAlias.BotAliasLocaleSettingsProperty(
-                    enabled=True,
-                    code_hook_specification=lex.CfnBotAlias.CodeHookSpecificationProperty(
-                        lambda_code_hook=lex.CfnBotAlias.LambdaCodeHookProperty(
-                            code_hook_interface_version="1.0",
-                            lambda_arn=unified_lambda_arn
+    def create_alias(construct_id, alias_name):
+        return lex.CfnBotAlias(
+            scope,
+            construct_id,
+            bot_alias_name=alias_name,
+            bot_id=lex_bot.ref,
+            bot_version=bot_version.attr_bot_version,
+            bot_alias_locale_settings=[
+                lex.CfnBotAlias.BotAliasLocaleSettingsItemProperty(
+                    locale_id="en_US",
+                    bot_alias_locale_setting=lex.CfnBotAlias.BotAliasLocaleSettingsProperty(
+                        enabled=True,
+                        code_hook_specification=lex.CfnBotAlias.CodeHookSpecificationProperty(
+                            lambda_code_hook=lex.CfnBotAlias.LambdaCodeHookProperty(
+                                code_hook_interface_version="1.0",
+                                lambda_arn=unified_lambda_arn
+                            )
                         )
                     )
                 )
-            )
-        ]
-    )
+            ]
+        )
+
+    # Create an explicit alias for Lex V2 (used by the default tenant)
+    lex_alias = create_alias("LexChatBotAlias", "Prod")
+
+    # One alias per additional tenant, named after it; the Lambda derives the
+    # tenant from the alias name Lex reports
+    aliases = {tenant: create_alias(f"LexChatBotAlias-{tenant}", tenant) for tenant in tenant_aliases}
+
     # Export outputs for frontend configuration
     CfnOutput(scope, "REACT_APP_LEX_BOT_ID",       value=lex_bot.ref)
     CfnOutput(scope, "REACT_APP_LEX_BOT_ALIAS_ID", value=lex_alias.ref)
-    return lex_bot, lex_alias
+    return lex_bot, lex_alias, aliases
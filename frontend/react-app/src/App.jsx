@@ -2,6 +2,8 @@ import React, { useState, useEffect, useContext } from "react";
 import { Interactions } from "aws-amplify";
 import { ConfigContext } from "./ConfigContext";
 
+const BOOKING_FIELDS = ["id", "room_id", "date", "start_time", "end_time", "attendees"];
+
 export default function App() {
   const awsConfig = useContext(ConfigContext);
 
@@ -16,9 +18,21 @@ export default function App() {
 
   async function fetchBookings() {
     try {
-      const res = await fetch(`${awsConfig.bookingApiUrl}bookings`);
+      // Request only the displayed fields, in columnar form (one array per field).
+      // The API key identifies this site's office
+      const res = await fetch(`${awsConfig.bookingApiUrl}bookings?fields=${BOOKING_FIELDS.join(",")}`, {
+        headers: {
+          Accept: "application/vnd.bookings.columnar+json",
+          "x-api-key": awsConfig.apiKey
+        }
+      });
       if (!res.ok) throw new Error(res.statusText);
-      setBookings(await res.json());
+      const { count, columns } = await res.json();
+      setBookings(
+        Array.from({ length: count }, (_, i) =>
+          Object.fromEntries(BOOKING_FIELDS.map((f) => [f, columns[f][i]]))
+        )
+      );
     } catch (e) {
       console.error("Failed to load bookings:", e);
     }
@@ -0,0 +1,360 @@
+import csv
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import boto3
+
+from serialization import to_plain
+from tenancy import DEFAULT_TENANT, tenant_item, validate_tenant
+
+# Bulk import/export of the directory and booking tables.
+#
+# POST /admin/import  {"table": "rooms", "tenant": "acme", "bucket": "...", "key": "rooms.csv",
+#                      "format": "csv" | "ndjson", "delete_missing": false}
+# GET  /admin/export?table=rooms&tenant=acme   (one tenant)
+# GET  /admin/export?table=rooms&segments=8    (whole table)
+#
+# Imports apply to one tenant: keys are prefixed and items stamped with the
+# tenant (see tenancy.py), so files can hold plain local IDs. A tenant's rooms
+# and staff are read through TenantIndex; bookings have no such index (see
+# the stack), so a tenant's bookings are read with a filtered parallel scan.
+#
+# Both actions can also be invoked directly (e.g. from a nightly scheduler)
+# with {"action": "import" | "export", ...} to avoid the 29 s API Gateway limit.
+#
+# {"action": "migrate", "tenant": "default"} (direct invocation only) stamps
+# data written before multi-tenancy with a tenant; see migrate_table.
+
+s3 = boto3.client("s3")
+
+ADMIN_BUCKET     = os.environ.get("ADMIN_BUCKET")
+EXPORT_SEGMENTS  = int(os.environ.get("EXPORT_SEGMENTS", "4"))
+EXPORT_PART_SIZE = int(os.environ.get("EXPORT_PART_SIZE", str(8 * 1024 * 1024)))
+PROGRESS_EVERY   = int(os.environ.get("PROGRESS_EVERY", "1000"))
+
+# table alias -> (table name, partition key)
+TABLES = {
+    "bookings": (os.environ.get("BOOKINGS_TABLE"), "id"),
+    "rooms":    (os.environ.get("ROOMS_TABLE"), "room_id"),
+    "staff":    (os.environ.get("STAFF_TABLE"), "staff_id"),
+}
+
+# Tables with a TenantIndex GSI
+TENANT_INDEXED = {"rooms", "staff"}
+
+
+def resolve_table(alias):
+    if alias not in TABLES:
+        raise ValueError(f"Unknown table '{alias}'. Expected one of: {', '.join(TABLES)}.")
+    return TABLES[alias]
+
+
+def log_progress(stage, table, count, started):
+    elapsed = time.monotonic() - started
+    print(json.dumps({
+        "stage": stage,
+        "table": table,
+        "records": count,
+        "elapsed_seconds": round(elapsed, 3),
+        "records_per_second": round(count / elapsed, 1) if elapsed else None
+    }))
+
+
+def parallel_scan(table_name, segments, handle_page, tenant=None):
+    """
+    Scan a table with `segments` parallel workers (Segment/TotalSegments),
+    optionally keeping only one tenant's items.
+    `handle_page(segment, items)` is called for every page a worker reads;
+    the per-segment return values of the last call are collected and returned.
+    """
+    def scan_segment(segment):
+        # boto3 resources are not thread safe, so each worker gets its own
+        table = boto3.session.Session().resource("dynamodb").Table(table_name)
+        kwargs = {"Segment": segment, "TotalSegments": segments}
+        if tenant:
+            kwargs["FilterExpression"] = "tenant_id = :tenant"
+            kwargs["ExpressionAttributeValues"] = {":tenant": tenant}
+        result = None
+        while True:
+            page = table.scan(**kwargs)
+            result = handle_page(segment, page["Items"])
+            if "LastEvaluatedKey" not in page:
+                return result
+            kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        return list(pool.map(scan_segment, range(segments)))
+
+
+# ─── Import ──────────────────────────────────────────────
+
+def parse_csv_value(column, raw):
+    # Columns are strings unless the header carries a type suffix,
+    # e.g. "capacity:N" for numbers or "attendees:json" for lists/maps.
+    name, _, kind = column.partition(":")
+    if raw is None or raw == "":
+        return name, None
+    if kind == "N":
+        return name, Decimal(raw)
+    if kind == "json":
+        return name, json.loads(raw, parse_float=Decimal)
+    return name, raw
+
+
+def read_records(bucket, key, fmt):
+    """Stream records from an S3 object line by line."""
+    lines = (line.decode("utf-8") for line in s3.get_object(Bucket=bucket, Key=key)["Body"].iter_lines())
+    if fmt == "ndjson":
+        for line in lines:
+            if line.strip():
+                yield json.loads(line, parse_float=Decimal)
+    elif fmt == "csv":
+        for row in csv.DictReader(lines):
+            record = {}
+            for column, raw in row.items():
+                name, value = parse_csv_value(column, raw)
+                if value is not None:
+                    record[name] = value
+            yield record
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'. Use 'csv' or 'ndjson'.")
+
+
+def query_tenant(table_name, tenant, handle_page):
+    """Read one tenant's items through the TenantIndex GSI, page by page."""
+    table = boto3.resource("dynamodb").Table(table_name)
+    kwargs = {
+        "IndexName": "TenantIndex",
+        "KeyConditionExpression": "tenant_id = :tenant",
+        "ExpressionAttributeValues": {":tenant": tenant}
+    }
+    while True:
+        page = table.query(**kwargs)
+        handle_page(0, page["Items"])
+        if "LastEvaluatedKey" not in page:
+            return
+        kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+
+def read_tenant(alias, tenant, segments, handle_page):
+    """Read one tenant's items page by page, through TenantIndex where the table has one."""
+    table_name, _ = resolve_table(alias)
+    if alias in TENANT_INDEXED:
+        query_tenant(table_name, tenant, handle_page)
+    else:
+        parallel_scan(table_name, segments, handle_page, tenant=tenant)
+
+
+def load_current_state(alias, key_name, tenant, segments=EXPORT_SEGMENTS):
+    current = {}
+    read_tenant(alias, tenant, segments, lambda segment, items: current.update(
+        (item[key_name], item) for item in items
+    ))
+    return current
+
+
+def import_table(alias, bucket, key, fmt="ndjson", delete_missing=False, tenant=DEFAULT_TENANT):
+    table_name, key_name = resolve_table(alias)
+    tenant = validate_tenant(tenant)
+    started = time.monotonic()
+
+    current = load_current_state(alias, key_name, tenant)
+    log_progress("loaded", alias, len(current), started)
+
+    table = boto3.resource("dynamodb").Table(table_name)
+    seen = set()
+    read = unchanged = written = deleted = 0
+
+    # batch_writer groups puts/deletes into BatchWriteItem calls of 25
+    # and resubmits unprocessed items
+    with table.batch_writer(overwrite_by_pkeys=[key_name]) as batch:
+        for record in read_records(bucket, key, fmt):
+            read += 1
+            if key_name not in record:
+                raise ValueError(f"Record {read} is missing key '{key_name}'.")
+            record = tenant_item(alias, tenant, record)
+            record_key = record[key_name]
+            seen.add(record_key)
+            if current.get(record_key) == record:
+                unchanged += 1
+            else:
+                batch.put_item(Item=record)
+                written += 1
+            if read % PROGRESS_EVERY == 0:
+                log_progress("importing", alias, read, started)
+
+        if delete_missing:
+            for record_key in current.keys() - seen:
+                batch.delete_item(Key={key_name: record_key})
+                deleted += 1
+
+    elapsed = time.monotonic() - started
+    log_progress("imported", alias, read, started)
+    return {
+        "table": alias,
+        "tenant": tenant,
+        "read": read,
+        "written": written,
+        "unchanged": unchanged,
+        "deleted": deleted,
+        "elapsed_seconds": round(elapsed, 3),
+        "records_per_second": round(read / elapsed, 1) if elapsed else None
+    }
+
+
+# ─── Export ──────────────────────────────────────────────
+
+def export_table(alias, bucket=ADMIN_BUCKET, segments=EXPORT_SEGMENTS, tenant=None):
+    table_name, _ = resolve_table(alias)
+    started = time.monotonic()
+    if tenant:
+        tenant = validate_tenant(tenant)
+        if alias in TENANT_INDEXED:
+            # A tenant's items live in one index partition, read sequentially
+            segments = 1
+    prefix = f"exports/{alias}/{tenant or 'all'}/{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    # Per-segment buffers; each segment is only touched by its own worker
+    buffers = [[] for _ in range(segments)]
+    sizes   = [0] * segments
+    parts   = [[] for _ in range(segments)]
+    counts  = [0] * segments
+
+    def flush(segment):
+        if not buffers[segment]:
+            return
+        part_key = f"{prefix}/part-{segment:04d}-{len(parts[segment]):04d}.ndjson"
+        s3.put_object(Bucket=bucket, Key=part_key, Body="".join(buffers[segment]).encode("utf-8"))
+        parts[segment].append(part_key)
+        buffers[segment] = []
+        sizes[segment] = 0
+
+    def write_page(segment, items):
+        for item in items:
+            line = json.dumps(item, default=to_plain) + "\n"
+            buffers[segment].append(line)
+            sizes[segment] += len(line)
+        counts[segment] += len(items)
+        if sizes[segment] >= EXPORT_PART_SIZE:
+            flush(segment)
+            log_progress("exporting", alias, sum(counts), started)
+
+    if tenant:
+        read_tenant(alias, tenant, segments, write_page)
+    else:
+        parallel_scan(table_name, segments, write_page)
+    for segment in range(segments):
+        flush(segment)
+
+    total = sum(counts)
+    elapsed = time.monotonic() - started
+    log_progress("exported", alias, total, started)
+    return {
+        "table": alias,
+        "tenant": tenant,
+        "items": total,
+        "segments": segments,
+        "bucket": bucket,
+        "objects": [key for segment_parts in parts for key in segment_parts],
+        "elapsed_seconds": round(elapsed, 3),
+        "items_per_second": round(total / elapsed, 1) if elapsed else None
+    }
+
+
+# ─── Migration ───────────────────────────────────────────
+
+def migrate_table(alias, tenant=DEFAULT_TENANT, segments=EXPORT_SEGMENTS):
+    """
+    Give items written before multi-tenancy to `tenant`: tenant_id, prefixed
+    keys and tenant_date. The old un-prefixed key is deleted. Items that
+    already have a tenant_id are left alone, so it is safe to re-run.
+    """
+    table_name, key_name = resolve_table(alias)
+    tenant = validate_tenant(tenant)
+    started = time.monotonic()
+    tables = {}
+    counts = [0] * segments
+
+    def migrate_page(segment, items):
+        legacy = [item for item in items if "tenant_id" not in item]
+        if legacy:
+            if segment not in tables:
+                tables[segment] = boto3.session.Session().resource("dynamodb").Table(table_name)
+            with tables[segment].batch_writer() as batch:
+                for item in legacy:
+                    migrated = tenant_item(alias, tenant, item)
+                    batch.put_item(Item=migrated)
+                    if migrated[key_name] != item[key_name]:
+                        batch.delete_item(Key={key_name: item[key_name]})
+            counts[segment] += len(legacy)
+        return counts[segment]
+
+    parallel_scan(table_name, segments, migrate_page)
+
+    total = sum(counts)
+    elapsed = time.monotonic() - started
+    log_progress("migrated", alias, total, started)
+    return {
+        "table": alias,
+        "tenant": tenant,
+        "migrated": total,
+        "elapsed_seconds": round(elapsed, 3)
+    }
+
+
+# ─── Handler ─────────────────────────────────────────────
+
+def run_action(action, params):
+    segments = int(params.get("segments") or EXPORT_SEGMENTS)
+    if action == "import":
+        return import_table(
+            params["table"],
+            params.get("bucket") or ADMIN_BUCKET,
+            params["key"],
+            fmt=params.get("format", "ndjson"),
+            delete_missing=bool(params.get("delete_missing", False)),
+            tenant=params.get("tenant") or DEFAULT_TENANT
+        )
+    if action == "export":
+        return export_table(params["table"], bucket=params.get("bucket") or ADMIN_BUCKET, segments=segments,
+                            tenant=params.get("tenant"))
+    if action == "migrate":
+        aliases = [params["table"]] if params.get("table") else list(TABLES)
+        return [migrate_table(alias, params.get("tenant") or DEFAULT_TENANT, segments) for alias in aliases]
+    raise ValueError(f"Unknown action '{action}'.")
+
+
+def lambda_handler(event, context):
+    method = event.get("httpMethod", "")
+    path   = event.get("path", "")
+
+    # Direct invocation
+    if not method:
+        return run_action(event.get("action"), event)
+
+    if method == "POST" and path.endswith("/admin/import"):
+        action, params = "import", json.loads(event.get("body") or "{}")
+    elif method == "GET" and path.endswith("/admin/export"):
+        action, params = "export", event.get("queryStringParameters") or {}
+    else:
+        return {"statusCode": 404, "body": json.dumps({"error": "Not found"})}
+
+    try:
+        result = run_action(action, params)
+        status = 200
+    except (KeyError, ValueError) as e:
+        result = {"error": f"Invalid request: {e}"}
+        status = 400
+    except Exception as e:
+        result = {"error": str(e)}
+        status = 500
+
+    return {
+        "statusCode": status,
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps(result)
+    }
@@ -0,0 +1,150 @@
+from datetime import date, datetime, timedelta
+
+# Booking rules, compiled once per container from the BOOKING_POLICY
+# environment variable (JSON). Top-level keys are defaults for every office
+# and room; "tenants" overrides them per office, including the office's
+# time zone (utc_offset_minutes) and its own per-room_id "rooms" overrides.
+# Room IDs are local to an office, so top-level "rooms" belong to the
+# default office only:
+#
+#   {"open": "08:00", "close": "18:00", "min_duration": 15, "max_duration": 240,
+#    "buffer": 10, "max_days_ahead": 90, "weekdays_only": true,
+#    "utc_offset_minutes": 0,
+#    "rooms": {"5": {"open": "09:00", "close": "17:00", "max_duration": 120}},
+#    "tenants": {"acme": {"utc_offset_minutes": -300,
+#                         "rooms": {"5": {"buffer": 15}}}}}
+#
+# Every rule becomes a small predicate over pre-parsed integers, so a request
+# is validated without any database call.
+
+DEFAULT_POLICY = {
+    "open": "07:00",
+    "close": "20:00",
+    "min_duration": 15,
+    "max_duration": 480,
+    "buffer": 0,
+    "max_days_ahead": 365,
+    "weekdays_only": False,
+    "utc_offset_minutes": 0
+}
+
+
+def to_minutes(hhmm):
+    return int(hhmm[0:2]) * 60 + int(hhmm[3:5])
+
+
+def from_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def compile_rules(spec):
+    """Turn one room's rule spec into a tuple of check(day, start, end, today, now) -> message or None."""
+    checks = []
+
+    min_duration, max_duration = int(spec["min_duration"]), int(spec["max_duration"])
+    checks.append(lambda day, start, end, today, now:
+                  None if min_duration <= end - start <= max_duration
+                  else f"Meetings must last between {min_duration} and {max_duration} minutes.")
+
+    opens, closes = to_minutes(spec["open"]), to_minutes(spec["close"])
+    hours = f"{spec['open']} and {spec['close']}"
+    checks.append(lambda day, start, end, today, now:
+                  None if opens <= start and end <= closes
+                  else f"Meetings must be between {hours}.")
+
+    checks.append(lambda day, start, end, today, now:
+                  None if day > today or (day == today and start >= now)
+                  else "Meetings cannot be booked in the past.")
+
+    max_days_ahead = int(spec["max_days_ahead"])
+    checks.append(lambda day, start, end, today, now:
+                  None if (day - today).days <= max_days_ahead
+                  else f"Meetings can be booked at most {max_days_ahead} days ahead.")
+
+    if spec.get("weekdays_only"):
+        checks.append(lambda day, start, end, today, now:
+                      None if day.weekday() < 5 else "Meetings can only be booked on weekdays.")
+
+    return tuple(checks)
+
+
+class OfficePolicy:
+    """One office's compiled rules: defaults plus per-room overrides."""
+
+    def __init__(self, spec):
+        spec = dict(spec)
+        room_specs = spec.pop("rooms", {}) or {}
+        self.offset = timedelta(minutes=int(spec["utc_offset_minutes"]))
+        self.default_rules = compile_rules(spec)
+        self.default_buffer = int(spec["buffer"])
+        self.room_rules = {}
+        self.room_buffers = {}
+        for room_id, overrides in room_specs.items():
+            merged = dict(spec, **overrides)
+            self.room_rules[room_id] = compile_rules(merged)
+            self.room_buffers[room_id] = int(merged["buffer"])
+        self.max_buffer = max([self.default_buffer, *self.room_buffers.values()])
+
+    def has_room_rules(self, room_id):
+        return room_id in self.room_rules
+
+    def buffer(self, room_id=None):
+        """Cleanup minutes to keep free before and after a meeting in this room."""
+        return self.room_buffers.get(room_id, self.default_buffer)
+
+    def local_now(self):
+        """Current date and time in the office's time zone."""
+        return datetime.utcnow() + self.offset
+
+    def check(self, date_str, start_time, duration, room_id=None):
+        """Return the first rule violated by the request, or None."""
+        try:
+            day = date.fromisoformat(date_str)
+            start = to_minutes(start_time)
+        except (TypeError, ValueError):
+            return "Please give the date as YYYY-MM-DD and the time as HH:MM."
+        end = start + int(duration)
+        local_now = self.local_now()
+        today, now = local_now.date(), local_now.hour * 60 + local_now.minute
+        for check in self.room_rules.get(room_id, self.default_rules):
+            message = check(day, start, end, today, now)
+            if message:
+                return message
+        return None
+
+    def buffered_window(self, start_time, duration, room_id=None):
+        """(start_time, duration) widened by the room's buffer on both sides, clamped to the day."""
+        buffer = self.buffer(room_id) if room_id is not None else self.max_buffer
+        start = max(0, to_minutes(start_time) - buffer)
+        end = min(24 * 60 - 1, to_minutes(start_time) + int(duration) + buffer)
+        return from_minutes(start), end - start
+
+
+class BookingPolicy:
+    """Rules for every office; offices without a "tenants" entry share the defaults."""
+
+    def __init__(self, spec=None, default_tenant="default"):
+        spec = dict(DEFAULT_POLICY, **(spec or {}))
+        tenant_specs = dict(spec.pop("tenants", {}) or {})
+        default_rooms = spec.pop("rooms", {}) or {}
+        if default_rooms:
+            tenant_specs[default_tenant] = dict({"rooms": default_rooms}, **tenant_specs.get(default_tenant, {}))
+        self.default = OfficePolicy(spec)
+        self.offices = {tenant: OfficePolicy(dict(spec, **overrides)) for tenant, overrides in tenant_specs.items()}
+
+    def office(self, tenant):
+        return self.offices.get(tenant, self.default)
+
+    def has_room_rules(self, tenant, room_id):
+        return self.office(tenant).has_room_rules(room_id)
+
+    def check(self, tenant, date_str, start_time, duration, room_id=None):
+        """Return the first of the office's rules violated by the request, or None."""
+        return self.office(tenant).check(date_str, start_time, duration, room_id)
+
+    def buffered_window(self, tenant, start_time, duration, room_id=None):
+        return self.office(tenant).buffered_window(start_time, duration, room_id)
+
+    def today(self, tenant):
+        """The office's current date."""
+        return self.office(tenant).local_now().date()
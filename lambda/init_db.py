@@ -2,6 +2,8 @@ import boto3
 import json
 import os
 
+from tenancy import DEFAULT_TENANT, tenant_item
+
 # Initialize DynamoDB clients
 dynamodb = boto3.resource("dynamodb")
 
@@ -15,10 +17,10 @@ def load_sample_data(file_path):
     with open(file_path, "r") as file:
         return json.load(file)
 
-def seed_table(table_name, data):
+def seed_table(table_name, alias, data):
     table = dynamodb.Table(table_name)
     for item in data:
-        table.put_item(Item=item)
+        table.put_item(Item=tenant_item(alias, DEFAULT_TENANT, item))
 
 def lambda_handler(event, context):
     try:
@@ -26,9 +28,10 @@ def lambda_handler(event, context):
         sample_data = load_sample_data("/var/task/sample_data.json")
 
         # Insert data into DynamoDB tables
-        seed_table(BOOKINGS_TABLE, sample_data.get("bookings", []))
-        seed_table(ROOMS_TABLE, sample_data.get("rooms", []))
-        seed_table(STAFF_TABLE, sample_data.get("staff", []))
+        # Sample data belongs to the default tenant
+        seed_table(BOOKINGS_TABLE, "bookings", sample_data.get("bookings", []))
+        seed_table(ROOMS_TABLE, "rooms", sample_data.get("rooms", []))
+        seed_table(STAFF_TABLE, "staff", sample_data.get("staff", []))
 
         return {
             "statusCode": 200,
@@ -0,0 +1,10 @@
+from decimal import Decimal
+
+# JSON helpers shared by the Lambda functions.
+
+
+def to_plain(value):
+    """Convert DynamoDB Decimals into JSON-serializable numbers."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
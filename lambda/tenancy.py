@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Tenant (office) isolation helpers shared by the Lambda functions.
+#
+# Every item carries a tenant_id attribute and its primary key is prefixed
+# with "<tenant>#", so offices never share a key. Per-tenant reads go through
+# the TenantIndex GSIs of the rooms and staff tables, and bookings through
+# TenantDateIndex one date at a time, instead of scanning the whole table.
+# Local IDs (room "1", staff "2") must not contain "#".
+#
+# The tenant of a request is decided by the deployment, never by the caller:
+# HTTP requests by their API Gateway API key (one per office, TENANT_API_KEYS
+# maps office -> key ID) and Lex requests by the bot alias they were allowed
+# to invoke (one alias per office, named after it).
+
+DEFAULT_TENANT = os.environ.get("DEFAULT_TENANT", "default")
+TENANT_PATTERN = re.compile(r"^[a-z0-9][a-z0-9-]{0,39}$")
+
+TENANTS = {t.strip() for t in os.environ.get("TENANTS", "").split(",") if t.strip()} | {DEFAULT_TENANT}
+API_KEY_TENANTS = {
+    key_id: tenant for tenant, key_id in json.loads(os.environ.get("TENANT_API_KEYS") or "{}").items()
+}
+
+# table alias -> primary key attribute
+KEY_ATTRIBUTES = {"bookings": "id", "rooms": "room_id", "staff": "staff_id"}
+
+
+def validate_tenant(tenant):
+    tenant = (tenant or DEFAULT_TENANT).strip().lower()
+    if not TENANT_PATTERN.match(tenant):
+        raise ValueError(f"Invalid tenant '{tenant}'.")
+    return tenant
+
+
+def tenant_from_lex(event):
+    """
+    Tenant of the bot alias Lex invoked us through. Aliases named after an
+    office belong to it; any other alias (the "Prod" alias, the console's
+    TestBotAlias) belongs to DEFAULT_TENANT. Who may call which alias is
+    controlled by IAM.
+    """
+    alias = (event.get("bot") or {}).get("aliasName")
+    return alias if alias in TENANTS else DEFAULT_TENANT
+
+
+def tenant_from_http(event):
+    """
+    Tenant of the API key API Gateway validated for the request. Without
+    TENANT_API_KEYS (single-office deployments) every request is DEFAULT_TENANT.
+    """
+    if not API_KEY_TENANTS:
+        return DEFAULT_TENANT
+    key_id = ((event.get("requestContext") or {}).get("identity") or {}).get("apiKeyId")
+    tenant = API_KEY_TENANTS.get(key_id)
+    if tenant is None:
+        raise PermissionError("A valid API key is required.")
+    return tenant
+
+
+def local_id(key):
+    return key.split("#", 1)[1] if "#" in key else key
+
+
+def tenant_key(tenant, local):
+    return f"{tenant}#{local_id(local)}"
+
+
+def date_partition(tenant, date, room_id=None, shard=None):
+    """
+    TenantDateIndex partition for a tenant's bookings on a date. Bookings of
+    rooms with write_shards > 1 are spread over "<tenant>#<date>#<room>.<n>"
+    so one very busy room doesn't concentrate writes on a single key.
+    """
+    base = f"{tenant}#{date}"
+    return base if shard is None else f"{base}#{room_id}.{shard}"
+
+
+def tenant_item(alias, tenant, item):
+    """Stamp an item with its tenant and tenant-prefixed keys."""
+    key_name = KEY_ATTRIBUTES[alias]
+    item = dict(item, tenant_id=tenant)
+    item[key_name] = tenant_key(tenant, item[key_name])
+    if alias == "bookings":
+        # Always derived from the target tenant; stamped bookings go to the
+        # date's base partition, which every read includes
+        item["tenant_date"] = date_partition(tenant, item["date"])
+    return item
+
+
+class LRUCache:
+    """
+    Thread-safe LRU map bounded by entry count and by the approximate size
+    (bytes) reported for each entry. Used for per-tenant directories so a
+    container serving many offices keeps only the busiest in memory.
+    """
+
+    def __init__(self, max_entries, max_bytes=0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size=0):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            while len(self.entries) > 1 and (
+                len(self.entries) > self.max_entries
+                or (self.max_bytes and self.total_bytes > self.max_bytes)
+            ):
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+
+def approximate_size(items):
+    return len(json.dumps(items, default=str))
+
+
+class TenantThrottle:
+    """
+    Per-tenant token buckets (rate requests/s, burst capacity). Limits are
+    per container, so the effective ceiling scales with concurrency, but a
+    single office flooding requests is shed before it reaches DynamoDB.
+    """
+
+    def __init__(self, rate, burst, max_tenants=1000):
+        self.rate = rate
+        self.burst = burst or rate
+        self.buckets = LRUCache(max_tenants)
+        self.lock = threading.Lock()
+
+    def allow(self, tenant):
+        if not self.rate:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            tokens, updated = self.buckets.get(tenant) or (self.burst, now)
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            self.buckets.put(tenant, (tokens - 1 if allowed else tokens, now))
+            return allowed
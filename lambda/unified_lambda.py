@@ -1,11 +1,27 @@
 import json
 import boto3
 import uuid
+import hashlib
 import random
 import difflib
 from datetime import datetime, timedelta
 import os
 import re
+import time
+import base64
+from bisect import bisect_left
+from botocore.exceptions import ClientError
+from booking_policy import BookingPolicy
+from serialization import to_plain
+from tenancy import (
+    DEFAULT_TENANT, LRUCache, TenantThrottle, approximate_size, date_partition,
+    local_id, tenant_from_http, tenant_from_lex, tenant_key
+)
+
+try:
+    import msgpack
+except ImportError:  # optional; MessagePack responses need it bundled with the function
+    msgpack = None
 
 # Initialize DynamoDB tables from environment
 
@@ -13,6 +29,17 @@ dynamodb = boto3.resource("dynamodb")
 bookings_table = dynamodb.Table(os.environ["BOOKINGS_TABLE"])
 rooms_table    = dynamodb.Table(os.environ["ROOMS_TABLE"])
 staff_table    = dynamodb.Table(os.environ["STAFF_TABLE"])
+dedup_table    = dynamodb.Table(os.environ["DEDUP_TABLE"])
+waitlist_table = dynamodb.Table(os.environ["WAITLIST_TABLE"])
+schedule_table = dynamodb.Table(os.environ["SCHEDULE_TABLE"])
+
+# The resource's client accepts plain Python values too; used for transactions
+dynamodb_client = dynamodb.meta.client
+
+# Completed requests are remembered for IDEMPOTENCY_TTL seconds; an in-flight
+# claim expires after IN_PROGRESS_TTL so a timed-out invocation can be retried
+IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", "86400"))
+IN_PROGRESS_TTL = int(os.environ.get("IN_PROGRESS_TTL", "60"))
 
 
 def to_alphanumeric(s: str) -> str:
@@ -20,15 +47,137 @@ def to_alphanumeric(s: str) -> str:
     return re.sub(r'[^0-9a-zA-Z]', '', s).lower()
 
 
-def resolve_room(raw_room_name):
-    # 1) Scan all rooms
-    rooms = rooms_table.scan()["Items"]
-    # 2) Create normalized name -> id map
-    name_to_id = {
-        to_alphanumeric(r["room_name"]): r["room_id"]
-        for r in rooms
-    }
-    # 3) Normalize user input and fuzzy-match
+# Booking rules are compiled once per container, per office; see booking_policy.py
+POLICY = BookingPolicy(json.loads(os.environ.get("BOOKING_POLICY") or "{}"), DEFAULT_TENANT)
+
+# How long a warm container keeps a tenant's room and staff directories
+# before re-reading them, and for how many tenants (and roughly how many
+# bytes of them) before evicting the least recently used
+DIRECTORY_TTL            = int(os.environ.get("DIRECTORY_TTL", "300"))
+DIRECTORY_CACHE_TENANTS  = int(os.environ.get("DIRECTORY_CACHE_TENANTS", "50"))
+DIRECTORY_CACHE_BYTES    = int(os.environ.get("DIRECTORY_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+# Requests per second (and burst) each tenant may make per container; 0 disables
+TENANT_RATE  = float(os.environ.get("TENANT_RATE", "20"))
+TENANT_BURST = float(os.environ.get("TENANT_BURST", "40"))
+
+throttle = TenantThrottle(TENANT_RATE, TENANT_BURST)
+
+
+def query_all(table, **kwargs):
+    """Query every page of a partition, following LastEvaluatedKey."""
+    while True:
+        page = table.query(**kwargs)
+        yield from page["Items"]
+        if "LastEvaluatedKey" not in page:
+            return
+        kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+
+def tenant_items(table, tenant):
+    return list(query_all(
+        table,
+        IndexName="TenantIndex",
+        KeyConditionExpression="tenant_id = :tenant",
+        ExpressionAttributeValues={":tenant": tenant}
+    ))
+
+
+class RoomIndex:
+    """
+    In-memory room directory with precomputed lookup structures:
+    normalized names for fuzzy matching, a capacity-sorted array for
+    bisecting to the smallest room that fits, and equipment bitsets.
+    """
+
+    def __init__(self, rooms):
+        # Keyed by the tenant-local room ID
+        rooms = [dict(r, room_id=local_id(r["room_id"])) for r in rooms]
+        self.rooms = {r["room_id"]: r for r in rooms}
+        self.name_to_id = {to_alphanumeric(r["room_name"]): r["room_id"] for r in rooms}
+
+        ordered = sorted(rooms, key=lambda r: (int(r.get("capacity", 0)), r["room_id"]))
+        self.by_capacity = [r["room_id"] for r in ordered]
+        self.capacities  = [int(r.get("capacity", 0)) for r in ordered]
+
+        # Very busy rooms spread their bookings over several index partitions
+        self.write_shards = {
+            r["room_id"]: int(r["write_shards"]) for r in rooms if int(r.get("write_shards", 1)) > 1
+        }
+
+        self.equipment_bits = {}
+        self.equipment_mask = {}
+        for r in rooms:
+            mask = 0
+            for name in r.get("equipment", []):
+                key = to_alphanumeric(name)
+                if key not in self.equipment_bits:
+                    self.equipment_bits[key] = 1 << len(self.equipment_bits)
+                mask |= self.equipment_bits[key]
+            self.equipment_mask[r["room_id"]] = mask
+
+    def capacity(self, room_id):
+        return int(self.rooms[room_id].get("capacity", 0))
+
+    def missing_equipment(self, room_id, equipment):
+        """Requested equipment names the room does not have."""
+        mask = self.equipment_mask[room_id]
+        return [name for name in equipment if not mask & self.equipment_bits.get(to_alphanumeric(name), 0)]
+
+    def candidates(self, min_capacity=0, equipment=(), building=None, floor=None):
+        """Room IDs that satisfy the filters, smallest capacity first."""
+        required = 0
+        for name in equipment:
+            bit = self.equipment_bits.get(to_alphanumeric(name))
+            if bit is None:
+                return []
+            required |= bit
+
+        matches = []
+        for room_id in self.by_capacity[bisect_left(self.capacities, min_capacity):]:
+            if self.equipment_mask[room_id] & required != required:
+                continue
+            room = self.rooms[room_id]
+            if building is not None and to_alphanumeric(room.get("building", "")) != to_alphanumeric(building):
+                continue
+            if floor is not None and int(room.get("floor", -1)) != int(floor):
+                continue
+            matches.append(room_id)
+        return matches
+
+
+# Rooms and staff are cached separately (two entries per tenant), so callers
+# that only need rooms, like the waitlist matcher, never read the staff table
+_directories = LRUCache(2 * DIRECTORY_CACHE_TENANTS, DIRECTORY_CACHE_BYTES)
+
+
+def cached_directory(kind, tenant, table, build):
+    """
+    `build(items)` over a tenant's items in `table`, computed once per warm
+    container and refreshed after DIRECTORY_TTL seconds.
+    """
+    entry = _directories.get((kind, tenant))
+    if entry is None or time.monotonic() - entry["loaded_at"] > DIRECTORY_TTL:
+        items = tenant_items(table, tenant)
+        entry = {"loaded_at": time.monotonic(), "value": build(items)}
+        _directories.put((kind, tenant), entry, approximate_size(items))
+    return entry["value"]
+
+
+def get_room_index(tenant):
+    return cached_directory("rooms", tenant, rooms_table, RoomIndex)
+
+
+def get_staff_map(tenant):
+    """Lowercased full name -> tenant-local staff ID."""
+    return cached_directory("staff", tenant, staff_table, lambda staff: {
+        s["full_name"].lower(): local_id(s["staff_id"]) for s in staff
+    })
+
+
+def resolve_room(tenant, raw_room_name):
+    # Normalize user input and fuzzy-match against the cached room names
+    name_to_id = get_room_index(tenant).name_to_id
     norm_input = to_alphanumeric(raw_room_name)
     matches = difflib.get_close_matches(norm_input, name_to_id.keys(), n=1, cutoff=0.6)
     if not matches:
@@ -36,61 +185,531 @@ def resolve_room(raw_room_name):
     return name_to_id[matches[0]]
 
 
-def check_availability(room_id, date, start_time, duration=30):
-    end_time = (datetime.strptime(start_time, "%H:%M") + timedelta(minutes=duration)).strftime("%H:%M")
-    items = bookings_table.scan(
-        FilterExpression="room_id = :room AND #d = :date AND ((start_time BETWEEN :start AND :end) OR (end_time BETWEEN :start AND :end))",
-        ExpressionAttributeNames={"#d": "date"},
-        ExpressionAttributeValues={":room": room_id, ":date": date, ":start": start_time, ":end": end_time}
-    )["Items"]
-    return len(items) == 0
+def date_partitions(tenant, date, room_id=None):
+    """TenantDateIndex partitions holding a tenant's bookings on a date (for one room, or all)."""
+    shards = get_room_index(tenant).write_shards
+    rooms = [room_id] if room_id is not None else list(shards)
+    return [date_partition(tenant, date)] + [
+        date_partition(tenant, date, r, n) for r in rooms for n in range(shards.get(r, 0))
+    ]
+
+
+def write_partition(tenant, date, room_id):
+    shards = get_room_index(tenant).write_shards.get(room_id)
+    if not shards:
+        return date_partition(tenant, date)
+    return date_partition(tenant, date, room_id, random.randrange(shards))
+
 
+def bookings_on(tenant, date, room_id=None, start_time=None, end_time=None, projection=None):
+    """
+    A tenant's bookings on a date via TenantDateIndex, optionally for one
+    room and only those overlapping [start_time, end_time).
+    """
+    key_condition = "tenant_date = :partition"
+    filters, names, values = [], {}, {}
+    if end_time is not None:
+        key_condition += " AND start_time < :end"
+        values[":end"] = end_time
+    if start_time is not None:
+        filters.append("end_time > :start")
+        values[":start"] = start_time
+    if room_id is not None:
+        filters.append("room_id = :room")
+        values[":room"] = room_id
 
-def book_meeting(raw_room, date, start_time, duration, attendees):
-    # Resolve and check room
-    room_id = resolve_room(raw_room)
-    if not check_availability(room_id, date, start_time, duration):
-        return "Room already booked. Suggest another slot."
+    kwargs = {"IndexName": "TenantDateIndex", "KeyConditionExpression": key_condition}
+    if filters:
+        kwargs["FilterExpression"] = " AND ".join(filters)
+    if projection:
+        names = {f"#p{i}": field for i, field in enumerate(projection)}
+        kwargs["ProjectionExpression"] = ", ".join(names)
+        kwargs["ExpressionAttributeNames"] = names
 
+    for partition in date_partitions(tenant, date, room_id):
+        yield from query_all(bookings_table, ExpressionAttributeValues=dict(values, **{":partition": partition}), **kwargs)
+
+
+def check_availability(tenant, room_id, date, start_time, duration=30):
     end_time = (datetime.strptime(start_time, "%H:%M") + timedelta(minutes=duration)).strftime("%H:%M")
+    return next(bookings_on(tenant, date, room_id, start_time, end_time, projection=["room_id"]), None) is None
 
-    # Check each attendee for conflicts
-    for staff_id in attendees:
-        conflict = bookings_table.scan(
-            FilterExpression="contains(attendees, :staff) AND #d = :date AND ((start_time BETWEEN :start AND :end) OR (end_time BETWEEN :start AND :end))",
-            ExpressionAttributeNames={"#d": "date"},
-            ExpressionAttributeValues={
-                ":staff": staff_id,
-                ":date": date,
-                ":start": start_time,
-                ":end": end_time
-            }
-        )["Items"]
-        if conflict:
-            return f"Staff member {staff_id} is already booked."
 
-    # Resolve staff names to IDs
-    staff_db = staff_table.scan()["Items"]
-    staff_name_map = {s["full_name"].lower(): s["staff_id"] for s in staff_db}
+def booked_room_ids(tenant, date, start_time, end_time):
+    """IDs of rooms with a booking overlapping [start_time, end_time) on date."""
+    return {b["room_id"] for b in bookings_on(tenant, date, None, start_time, end_time, projection=["room_id"])}
+
+
+def policy_violation(tenant, raw_room, date, start_time, duration):
+    """First booking rule the request breaks, checked against in-memory data only."""
+    if raw_room is None:
+        # Auto-picked rooms with their own rules are filtered in find_free_rooms
+        return None if POLICY.office(tenant).room_rules else POLICY.check(tenant, date, start_time, duration)
+    return POLICY.check(tenant, date, start_time, duration, resolve_room(tenant, raw_room))
+
+
+def find_free_rooms(tenant, date, start_time, duration, attendee_count, equipment=(), building=None, floor=None):
+    """
+    Rooms that fit the attendees, have the requested equipment, are in the
+    requested building/floor and are free for the slot, smallest first.
+    Costs a single bookings query for the date.
+    """
+    candidates = get_room_index(tenant).candidates(
+        min_capacity=attendee_count, equipment=equipment, building=building, floor=floor
+    )
+    if not candidates:
+        raise ValueError(f"No room fits {attendee_count} attendees with the requested equipment and location.")
+
+    # Drop rooms whose rules reject the request; rooms without overrides share one check
+    default_violation = POLICY.check(tenant, date, start_time, duration)
+    allowed = [
+        room_id for room_id in candidates
+        if (POLICY.check(tenant, date, start_time, duration, room_id)
+            if POLICY.has_room_rules(tenant, room_id) else default_violation) is None
+    ]
+    if not allowed:
+        raise ValueError(default_violation or POLICY.check(tenant, date, start_time, duration, candidates[0]))
+
+    window_start, window_duration = POLICY.buffered_window(tenant, start_time, duration)
+    end_time = (datetime.strptime(window_start, "%H:%M") + timedelta(minutes=window_duration)).strftime("%H:%M")
+    busy = booked_room_ids(tenant, date, window_start, end_time)
+    return [room_id for room_id in allowed if room_id not in busy]
+
+
+def resolve_staff(tenant, attendees):
+    """Fuzzy-match attendee names to the tenant's staff IDs."""
+    staff_name_map = get_staff_map(tenant)
     corrected = []
     for name in attendees:
         match = difflib.get_close_matches(name.lower(), staff_name_map.keys(), n=1, cutoff=0.5)
         if not match:
-            return f"Staff {name} not found."
+            raise ValueError(f"Staff {name} not found.")
         corrected.append(staff_name_map[match[0]])
+    return corrected
+
+
+# ─── Room schedules ──────────────────────────────────────
+# Every room and date has a schedule item listing its bookings (booking ID ->
+# "HH:MM-HH:MM"). A booking is written in one transaction with its room's
+# schedule, conditioned on the schedule version that was checked, so two
+# concurrent writers (booking requests or waitlist promotions) can never
+# both take overlapping times; the loser re-reads and sees the winner.
+# The waitlist matcher takes removed, moved or shortened bookings off their
+# schedule. Bookings written by imports have no schedule entry; the
+# availability query before the write still sees them.
+
+SCHEDULE_RETRIES = int(os.environ.get("SCHEDULE_RETRIES", "5"))
+
+
+class BookingExists(Exception):
+    """The booking ID was already written (by a retry of the same request)."""
+
+
+def schedule_key(tenant, room_id, date):
+    return f"{tenant}#{room_id}#{date}"
+
+
+def read_schedule(tenant, room_id, date):
+    item = schedule_table.get_item(Key={"room_day": schedule_key(tenant, room_id, date)},
+                                   ConsistentRead=True).get("Item") or {}
+    return int(item.get("version", 0)), dict(item.get("bookings") or {})
+
+
+def schedule_item(tenant, room_id, date, version, bookings):
+    # Schedules expire (DynamoDB TTL) once their day is over
+    expires_at = int((datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)).timestamp())
+    return {"room_day": schedule_key(tenant, room_id, date), "version": version, "bookings": bookings,
+            "expires_at": expires_at}
+
+
+def schedule_condition(version):
+    return {"ConditionExpression": "attribute_not_exists(room_day) OR version = :version",
+            "ExpressionAttributeValues": {":version": version}}
+
 
-    # Write booking record
-    booking_id = str(uuid.uuid4())
-    bookings_table.put_item(Item={
-        "id": booking_id,
+def write_booking(tenant, booking, window_start, window_duration, overwrite=True):
+    """
+    Put `booking` and add it to its room's schedule in one transaction,
+    unless the schedule holds another booking overlapping the (buffered)
+    window. Returns False when the room is taken. With overwrite=False an
+    existing booking with the same ID raises BookingExists instead.
+    """
+    window_end = (datetime.strptime(window_start, "%H:%M") + timedelta(minutes=window_duration)).strftime("%H:%M")
+    put_booking = {"TableName": bookings_table.table_name, "Item": booking}
+    if not overwrite:
+        put_booking["ConditionExpression"] = "attribute_not_exists(id)"
+
+    for attempt in range(SCHEDULE_RETRIES):
+        version, bookings = read_schedule(tenant, booking["room_id"], booking["date"])
+        for booking_id, interval in bookings.items():
+            start, end = interval.split("-")
+            if booking_id != booking["id"] and start < window_end and end > window_start:
+                return False
+        bookings[booking["id"]] = f"{booking['start_time']}-{booking['end_time']}"
+        try:
+            dynamodb_client.transact_write_items(TransactItems=[
+                {"Put": dict(
+                    {"TableName": schedule_table.table_name,
+                     "Item": schedule_item(tenant, booking["room_id"], booking["date"], version + 1, bookings)},
+                    **schedule_condition(version)
+                )},
+                {"Put": put_booking}
+            ])
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("TransactionCanceledException", "TransactionConflictException"):
+                raise
+            reasons = [r.get("Code") for r in e.response.get("CancellationReasons", [])]
+            if reasons[1:2] == ["ConditionalCheckFailed"]:
+                raise BookingExists(booking["id"])
+            if attempt == SCHEDULE_RETRIES - 1:
+                raise
+            # Another writer changed the schedule first; check again against theirs
+
+
+def release_booking(tenant, room_id, date, booking_id):
+    """
+    Bring the room's schedule in line with a booking that was removed,
+    moved or shortened: drop it, or record its current times if it is still
+    in this room on this date. Safe to repeat.
+    """
+    current = bookings_table.get_item(Key={"id": booking_id}, ConsistentRead=True).get("Item")
+    interval = None
+    if current and (current.get("room_id"), current.get("date")) == (room_id, date):
+        interval = f"{current['start_time']}-{current['end_time']}"
+
+    for attempt in range(SCHEDULE_RETRIES):
+        version, bookings = read_schedule(tenant, room_id, date)
+        if booking_id not in bookings or bookings[booking_id] == interval:
+            return
+        if interval is None:
+            del bookings[booking_id]
+        else:
+            bookings[booking_id] = interval
+        try:
+            schedule_table.put_item(Item=schedule_item(tenant, room_id, date, version + 1, bookings),
+                                    **schedule_condition(version))
+            return
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException" or attempt == SCHEDULE_RETRIES - 1:
+                raise
+
+
+# ─── Waitlist ────────────────────────────────────────────
+# Waiters are kept per room and date (slot_key) and sorted by waiter_key,
+# "<priority>#<requested at>#<booking id>", so a Query returns them in
+# promotion order: lower priority number first, then first come first served.
+# Priorities are 0-9999 so the zero-padded key sorts numerically.
+
+DEFAULT_WAITLIST_PRIORITY = int(os.environ.get("DEFAULT_WAITLIST_PRIORITY", "100"))
+MAX_WAITLIST_PRIORITY     = 9999
+
+
+def waitlist_priority(requested):
+    """
+    Waitlist priority for a client-supplied value. Callers are not
+    authenticated, so they may defer themselves (a larger number) but never
+    rank ahead of DEFAULT_WAITLIST_PRIORITY.
+    """
+    priority = optional_int(requested, "Waitlist priority")
+    if priority is None:
+        return DEFAULT_WAITLIST_PRIORITY
+    if not 0 <= priority <= MAX_WAITLIST_PRIORITY:
+        raise ValueError(f"Waitlist priority must be between 0 and {MAX_WAITLIST_PRIORITY}.")
+    return max(priority, DEFAULT_WAITLIST_PRIORITY)
+
+
+def waitlist_slot_key(tenant, room_id, date):
+    return f"{tenant}#{room_id}#{date}"
+
+
+def add_to_waitlist(tenant, room_id, date, start_time, end_time, attendees, booking_id, priority=None):
+    slot_key = waitlist_slot_key(tenant, room_id, date)
+    # A retried request carries the same booking ID; don't queue it twice
+    existing = waitlist_table.query(
+        KeyConditionExpression="slot_key = :slot",
+        FilterExpression="booking_id = :id",
+        ExpressionAttributeValues={":slot": slot_key, ":id": booking_id}
+    )["Items"]
+    if existing:
+        return
+    priority = DEFAULT_WAITLIST_PRIORITY if priority is None else priority
+    # Waiters expire (DynamoDB TTL) once their day is over
+    expires_at = int((datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)).timestamp())
+    waitlist_table.put_item(Item={
+        "slot_key": slot_key,
+        "waiter_key": f"{priority:04d}#{datetime.utcnow().isoformat()}#{booking_id}",
+        "booking_id": booking_id,
+        "tenant_id": tenant,
         "room_id": room_id,
         "date": date,
         "start_time": start_time,
         "end_time": end_time,
-        "attendees": corrected
+        "attendees": attendees,
+        "expires_at": expires_at
     })
 
-    return f"Booking confirmed for room {raw_room} ({room_id}) at {start_time} on {date} with attendees: {', '.join(corrected)}."
+
+def book_meeting(tenant, raw_room, date, start_time, duration, attendees, equipment=(), booking_id=None, priority=None,
+                 building=None, floor=None):
+    booking_id = tenant_key(tenant, booking_id or str(uuid.uuid4()))
+    end_time = (datetime.strptime(start_time, "%H:%M") + timedelta(minutes=duration)).strftime("%H:%M")
+
+    # Resolve and check room, or list the free rooms that fit, smallest first
+    index = get_room_index(tenant)
+    if raw_room is None:
+        room_ids = find_free_rooms(tenant, date, start_time, duration, len(attendees), equipment, building, floor)
+        if not room_ids:
+            return "No suitable room is free at that time. Suggest another slot."
+    else:
+        room_id = resolve_room(tenant, raw_room)
+        violation = policy_violation(tenant, raw_room, date, start_time, duration)
+        if violation:
+            return violation
+        capacity = index.capacity(room_id)
+        if capacity and len(attendees) > capacity:
+            return f"Room {raw_room} only fits {capacity} people."
+        missing = index.missing_equipment(room_id, equipment)
+        if missing:
+            return f"Room {raw_room} does not have: {', '.join(missing)}."
+        window = POLICY.buffered_window(tenant, start_time, duration, room_id)
+        if not check_availability(tenant, room_id, date, *window):
+            return join_waitlist(tenant, raw_room, room_id, date, start_time, end_time,
+                                 resolve_staff(tenant, attendees), booking_id, priority)
+        room_ids = [room_id]
+
+    # Resolve staff names to IDs
+    corrected = resolve_staff(tenant, attendees)
+
+    # Check attendees for conflicts with one query of the day's overlapping bookings
+    for booking in bookings_on(tenant, date, None, start_time, end_time, projection=["attendees"]):
+        busy = set(booking.get("attendees", [])) & set(corrected)
+        if busy:
+            return f"Staff member {sorted(busy)[0]} is already booked."
+
+    # Write booking record together with the room's schedule; a room taken
+    # since the availability check moves on to the next free one
+    for room_id in room_ids:
+        booking = {
+            "id": booking_id,
+            "tenant_id": tenant,
+            "tenant_date": write_partition(tenant, date, room_id),
+            "room_id": room_id,
+            "date": date,
+            "start_time": start_time,
+            "end_time": end_time,
+            "attendees": corrected
+        }
+        if write_booking(tenant, booking, *POLICY.buffered_window(tenant, start_time, duration, room_id)):
+            return confirmation(raw_room or index.rooms[room_id]["room_name"], booking)
+
+    if raw_room is None:
+        return "No suitable room is free at that time. Suggest another slot."
+    return join_waitlist(tenant, raw_room, room_id, date, start_time, end_time, corrected, booking_id, priority)
+
+
+def join_waitlist(tenant, raw_room, room_id, date, start_time, end_time, staff_ids, booking_id, priority):
+    # A retry of a request the waitlist has since promoted finds its own booking
+    existing = bookings_table.get_item(Key={"id": booking_id}, ConsistentRead=True).get("Item")
+    if existing:
+        return confirmation(raw_room, existing)
+    add_to_waitlist(tenant, room_id, date, start_time, end_time, staff_ids, booking_id, priority)
+    return ("Room already booked. Suggest another slot. "
+            "You have been added to the waitlist and will be booked automatically if it frees up.")
+
+
+def confirmation(raw_room, booking):
+    return (f"Booking confirmed for room {raw_room} ({booking['room_id']}) at {booking['start_time']} "
+            f"on {booking['date']} with attendees: {', '.join(booking['attendees'])}.")
+
+
+def lex_idempotency_key(tenant, event):
+    """Same Lex session, intent and slot values -> same key, so retried invocations collapse."""
+    intent = event["sessionState"]["intent"]
+    values = sorted(
+        (name, slot["value"].get("interpretedValue"))
+        for name, slot in (intent.get("slots") or {}).items()
+        if slot and slot.get("value")
+    )
+    raw = json.dumps([event.get("sessionId"), intent["name"], values])
+    return f"{tenant}#lex#" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def http_idempotency_key(tenant, event):
+    """Hashed Idempotency-Key header, so a client-chosen value of any length makes a bounded key."""
+    for name, value in (event.get("headers") or {}).items():
+        if name.lower() == "idempotency-key" and value:
+            return f"{tenant}#http#" + hashlib.sha256(value.encode("utf-8")).hexdigest()
+    return None
+
+
+def request_fingerprint(request):
+    """Hash of a parsed request, independent of key order and whitespace in the body."""
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class IdempotencyKeyReused(Exception):
+    """An idempotency key was sent again with a different request."""
+
+
+def run_idempotent(key, action, fingerprint=None):
+    """
+    Run `action(booking_id)` at most once per idempotency key.
+    Returns (message, replayed). A retry of a confirmed booking gets the
+    original confirmation back without re-running any conflict checks.
+    A retry whose `fingerprint` differs from the original request's raises
+    IdempotencyKeyReused.
+    """
+    if key is None:
+        return action(None), False
+
+    now = int(time.time())
+    claim = {"idempotency_key": key, "status": "IN_PROGRESS", "expires_at": now + IN_PROGRESS_TTL}
+    if fingerprint is not None:
+        claim["request_hash"] = fingerprint
+    try:
+        dedup_table.put_item(
+            Item=claim,
+            ConditionExpression="attribute_not_exists(idempotency_key) OR expires_at < :now",
+            ExpressionAttributeValues={":now": now}
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        record = dedup_table.get_item(Key={"idempotency_key": key}, ConsistentRead=True).get("Item", {})
+        if record.get("request_hash", fingerprint) != fingerprint:
+            raise IdempotencyKeyReused("This Idempotency-Key was already used for a different booking request.")
+        if record.get("status") == "COMPLETED":
+            return record["response"], True
+        return "Your booking request is already being processed.", True
+
+    try:
+        # Deterministic ID: even a replay after the TTL overwrites rather than duplicates
+        message = action(str(uuid.uuid5(uuid.NAMESPACE_URL, key)))
+    except Exception:
+        dedup_table.delete_item(Key={"idempotency_key": key})
+        raise
+
+    if "confirmed" in message:
+        dedup_table.update_item(
+            Key={"idempotency_key": key},
+            UpdateExpression="SET #s = :s, #r = :r, expires_at = :exp",
+            ExpressionAttributeNames={"#s": "status", "#r": "response"},
+            ExpressionAttributeValues={":s": "COMPLETED", ":r": message, ":exp": now + IDEMPOTENCY_TTL}
+        )
+    else:
+        # Only confirmations are replayed; a rejected request may succeed later
+        dedup_table.delete_item(Key={"idempotency_key": key})
+    return message, False
+
+
+# ─── Booking listings ────────────────────────────────────
+
+BOOKING_FIELDS = ("id", "room_id", "date", "start_time", "end_time", "attendees")
+
+COLUMNAR_JSON = "application/vnd.bookings.columnar+json"
+MSGPACK       = "application/msgpack"
+
+LIST_DAYS     = int(os.environ.get("LIST_DAYS", "14"))
+LIST_MAX_DAYS = int(os.environ.get("LIST_MAX_DAYS", "62"))
+
+
+def parse_fields(raw_fields):
+    if not raw_fields:
+        return None
+    fields = [f.strip() for f in raw_fields.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in BOOKING_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(BOOKING_FIELDS)}.")
+    return fields
+
+
+def parse_dates(tenant, query):
+    """
+    Dates listed by GET /bookings: ?from=YYYY-MM-DD&to=YYYY-MM-DD, by default
+    the office's next LIST_DAYS days, at most LIST_MAX_DAYS at a time.
+    """
+    try:
+        first = (datetime.strptime(query["from"], "%Y-%m-%d").date() if query.get("from")
+                 else POLICY.today(tenant))
+        last = (datetime.strptime(query["to"], "%Y-%m-%d").date() if query.get("to")
+                else first + timedelta(days=LIST_DAYS - 1))
+    except ValueError:
+        raise ValueError("'from' and 'to' must be dates (YYYY-MM-DD).")
+    days = (last - first).days + 1
+    if not 0 < days <= LIST_MAX_DAYS:
+        raise ValueError(f"'to' must be on or after 'from', and at most {LIST_MAX_DAYS} days are listed at once.")
+    return [(first + timedelta(days=n)).isoformat() for n in range(days)]
+
+
+def list_bookings(tenant, dates, fields=None):
+    """
+    A tenant's bookings on the given dates, one TenantDateIndex query per date
+    partition. Only the requested attributes are projected, so DynamoDB
+    returns (and we decode) less.
+    """
+    return [booking for date in dates for booking in bookings_on(tenant, date, projection=fields)]
+
+
+def to_columns(items, fields):
+    """Columnar form: one array per field instead of repeating keys on every item."""
+    return {
+        "count": len(items),
+        "columns": {field: [item.get(field) for item in items] for field in fields}
+    }
+
+
+def accepts_json(accept):
+    """Whether an Accept header allows one of the JSON representations."""
+    media_types = {part.split(";")[0].strip().lower() for part in accept.split(",")}
+    return bool(media_types & {"application/json", COLUMNAR_JSON, "application/*", "*/*"})
+
+
+def bookings_response(tenant, event):
+    headers = {k.lower(): v for k, v in (event.get("headers") or {}).items()}
+    query   = event.get("queryStringParameters") or {}
+    accept  = headers.get("accept", "")
+    response_headers = {"Access-Control-Allow-Origin": "*", "Vary": "Accept"}
+
+    try:
+        fields = parse_fields(query.get("fields"))
+        dates = parse_dates(tenant, query)
+    except ValueError as e:
+        return {"statusCode": 400, "headers": response_headers, "body": json.dumps({"error": str(e)})}
+
+    if MSGPACK in accept and msgpack is None and not accepts_json(accept):
+        # msgpack isn't bundled with the function; don't answer in a format the client didn't ask for
+        return {
+            "statusCode": 406,
+            "headers": response_headers,
+            "body": json.dumps({"error": f"{MSGPACK} is not available; accept application/json or {COLUMNAR_JSON}."})
+        }
+
+    items = list_bookings(tenant, dates, fields)
+    columns = fields or BOOKING_FIELDS
+
+    if MSGPACK in accept and msgpack is not None:
+        packed = msgpack.packb(to_columns(items, columns), default=to_plain)
+        response_headers["Content-Type"] = MSGPACK
+        return {
+            "statusCode": 200,
+            "headers": response_headers,
+            "body": base64.b64encode(packed).decode("ascii"),
+            "isBase64Encoded": True
+        }
+
+    if COLUMNAR_JSON in accept:
+        response_headers["Content-Type"] = COLUMNAR_JSON
+        body = to_columns(items, columns)
+    else:
+        response_headers["Content-Type"] = "application/json"
+        body = items
+
+    return {
+        "statusCode": 200,
+        "headers": response_headers,
+        "body": json.dumps(body, default=to_plain, separators=(",", ":"))
+    }
 
 
 def fallback_response():
@@ -101,45 +720,163 @@ def fallback_response():
     ])
 
 
+def optional_int(value, label):
+    """Whole number from a slot or body field, None when absent."""
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{label} must be a whole number.")
+
+
+def parse_booking_request(raw_body):
+    """Fields of a POST /book body; KeyError/ValueError when it is malformed."""
+    body = json.loads(raw_body or "{}")
+    if not isinstance(body, dict):
+        raise ValueError("the body must be a JSON object.")
+
+    names = {}
+    for field in ("attendees", "equipment"):
+        value = body.get(field) or []
+        if isinstance(value, str):
+            value = [v.strip() for v in value.split(",")]
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ValueError(f"'{field}' must be a list of names.")
+        names[field] = value
+    if not names["attendees"]:
+        raise KeyError("attendees")
+
+    for field in ("date", "start_time"):
+        if not isinstance(body[field], str):
+            raise ValueError(f"'{field}' must be a string.")
+    for field in ("room", "building"):
+        if body.get(field) is not None and not isinstance(body[field], str):
+            raise ValueError(f"'{field}' must be a string.")
+
+    duration = optional_int(body["duration"], "Duration")
+    if duration is None:
+        raise KeyError("duration")
+
+    return {
+        "room": body.get("room"),
+        "date": body["date"],
+        "start_time": body["start_time"],
+        "duration": duration,
+        "attendees": names["attendees"],
+        "equipment": names["equipment"],
+        "priority": waitlist_priority(body.get("priority")),
+        "building": body.get("building"),
+        "floor": optional_int(body.get("floor"), "Floor")
+    }
+
+
+def slot_value(slots, name):
+    """Interpreted value of a Lex slot, or None when it was not filled."""
+    slot = slots.get(name)
+    if not slot or not slot.get("value"):
+        return None
+    return slot["value"].get("interpretedValue")
+
+
 def lambda_handler(event, context):
     # ─── Detect REST‐API HTTP events ─────────────────────────
     method = event.get("httpMethod", "")
     path   = event.get("path", "")
 
-    # ─── CORS preflight for /bookings ────────────────────────
-    if method == "OPTIONS" and path.endswith("/bookings"):
+    # ─── CORS preflight for /bookings and /book ──────────────
+    if method == "OPTIONS" and (path.endswith("/bookings") or path.endswith("/book")):
         return {
             "statusCode": 200,
             "headers": {
                 "Access-Control-Allow-Origin":  "*",
-                "Access-Control-Allow-Methods": "GET,OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type"
+                "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
+                "Access-Control-Allow-Headers": "Content-Type,Accept,Idempotency-Key,X-Api-Key"
             },
             "body": ""
         }
 
-    # ─── GET /bookings ───────────────────────────────────────
-    if method == "GET" and path.endswith("/bookings"):
-        items = bookings_table.scan()["Items"]
+    # ─── Tenant and per-tenant throttling ────────────────────
+    if method:
+        try:
+            tenant = tenant_from_http(event)
+        except PermissionError as e:
+            return {
+                "statusCode": 403,
+                "headers": {"Access-Control-Allow-Origin": "*"},
+                "body": json.dumps({"error": str(e)})
+            }
+        if not throttle.allow(tenant):
+            return {
+                "statusCode": 429,
+                "headers": {"Access-Control-Allow-Origin": "*", "Retry-After": "1"},
+                "body": json.dumps({"error": "Too many requests for this tenant."})
+            }
+
+    # ─── POST /book ──────────────────────────────────────────
+    if method == "POST" and path.endswith("/book"):
+        try:
+            request = parse_booking_request(event.get("body"))
+
+            # Rule violations are rejected before any table is touched
+            violation = policy_violation(tenant, request["room"], request["date"],
+                                         request["start_time"], request["duration"])
+            if violation:
+                message, replayed, status = violation, False, 422
+            else:
+                message, replayed = run_idempotent(
+                    http_idempotency_key(tenant, event),
+                    lambda booking_id: book_meeting(
+                        tenant, request["room"], request["date"], request["start_time"], request["duration"],
+                        request["attendees"], request["equipment"], booking_id, request["priority"],
+                        building=request["building"], floor=request["floor"]
+                    ),
+                    request_fingerprint(request)
+                )
+                status = 200 if "confirmed" in message else 409
+        except IdempotencyKeyReused as e:
+            message, replayed, status = str(e), False, 422
+        except (KeyError, ValueError) as e:
+            message, replayed, status = f"Invalid booking request: {e}", False, 400
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            throttled = code in ("ProvisionedThroughputExceededException", "ThrottlingException",
+                                 "RequestLimitExceeded", "TransactionCanceledException",
+                                 "TransactionConflictException")
+            message, replayed = f"Booking could not be completed ({code}). Please try again.", False
+            status = 503 if throttled else 500
         return {
-            "statusCode": 200,
+            "statusCode": status,
             "headers": {
-                "Access-Control-Allow-Origin": "*"
+                "Access-Control-Allow-Origin": "*",
+                "Idempotent-Replayed": "true" if replayed else "false"
             },
-            "body": json.dumps(items)
+            "body": json.dumps({"message": message})
         }
+
+    # ─── GET /bookings ───────────────────────────────────────
+    if method == "GET" and path.endswith("/bookings"):
+        return bookings_response(tenant, event)
     # ─── Lex chatbot logic ─────────────────────
     intent = event["sessionState"]["intent"]["name"]
     slots  = event["sessionState"]["intent"]["slots"]
     try:
+        tenant = tenant_from_lex(event)
+        # HTTP callers are also throttled per office by their API key's usage plan
+        if not throttle.allow(tenant):
+            raise ValueError("Too many requests from your office right now. Please try again in a moment.")
+
         if intent == "CheckAvailability":
             raw_room   = slots["Room"]["value"]["interpretedValue"]
             date       = slots["CheckDate"]["value"]["interpretedValue"]
             start_time = slots["CheckTime"]["value"]["interpretedValue"]
 
-            room_id   = resolve_room(raw_room)
-            available = check_availability(room_id, date, start_time)
-            if available:
+            room_id   = resolve_room(tenant, raw_room)
+            violation = POLICY.check(tenant, date, start_time, 30, room_id)
+            if violation:
+                message = f"❌ {violation}"
+                state   = "Failed"
+            elif check_availability(tenant, room_id, date, *POLICY.buffered_window(tenant, start_time, 30, room_id)):
                 message = f"✅ Room {raw_room} is available on {date} at {start_time}."
                 state   = "Fulfilled"
             else:
@@ -147,14 +884,32 @@ def lambda_handler(event, context):
                 state   = "Failed"
 
         elif intent == "BookMeeting":
-            raw_room    = slots["Room"]["value"]["interpretedValue"]
+            raw_room    = slot_value(slots, "Room")
             date        = slots["MeetingDate"]["value"]["interpretedValue"]
             start_time  = slots["MeetingTime"]["value"]["interpretedValue"]
             duration    = int(slots["Duration"]["value"]["interpretedValue"])
             attendees_r = slots["Attendees"]["value"]["interpretedValue"]
             attendees   = [a.strip() for a in attendees_r.split(",")]
+            equipment_r = slot_value(slots, "Equipment")
+            equipment   = [e.strip() for e in equipment_r.split(",")] if equipment_r else []
+            building    = slot_value(slots, "Building")
+            floor       = optional_int(slot_value(slots, "Floor"), "Floor")
+
+            # No room (or "any room") means pick the best fit automatically
+            if raw_room is not None and to_alphanumeric(raw_room) in ("", "any", "anyroom"):
+                raw_room = None
+
+            # Waitlist priority can be lowered by the client with a session attribute
+            priority = waitlist_priority((event["sessionState"].get("sessionAttributes") or {}).get("priority"))
 
-            message = book_meeting(raw_room, date, start_time, duration, attendees)
+            # Rule violations are rejected before any table is touched
+            message = policy_violation(tenant, raw_room, date, start_time, duration)
+            if message is None:
+                message, _ = run_idempotent(
+                    lex_idempotency_key(tenant, event),
+                    lambda booking_id: book_meeting(tenant, raw_room, date, start_time, duration, attendees,
+                                                    equipment, booking_id, priority, building=building, floor=floor)
+                )
             state   = "Fulfilled" if "confirmed" in message else "Failed"
 
         else:
@@ -0,0 +1,185 @@
+import os
+
+from boto3.dynamodb.types import TypeDeserializer
+
+import unified_lambda as booking
+from booking_policy import from_minutes, to_minutes
+
+# Triggered by the bookings table stream. When a booking is removed or
+# shortened, the waiters for that room and date whose requests overlap the
+# freed time are promoted in priority order into whatever part of it is
+# now free. The freed bookings are first taken off the room's schedule (see
+# unified_lambda.py), which every booking write is checked against.
+#
+# Work per invocation is bounded: at most MAX_SLOTS_PER_BATCH room-dates,
+# MAX_WAITERS_PER_SLOT waiters read per room-date (in pages of
+# WAITER_PAGE_SIZE), and each room-date costs those waitlist pages, one
+# Query of that tenant's day of bookings and a schedule update per freed
+# booking and per promotion. Room-dates past either limit, or
+# that fail, are reported as batchItemFailures so the stream redelivers the
+# batch from that record.
+
+MAX_SLOTS_PER_BATCH  = int(os.environ.get("MAX_SLOTS_PER_BATCH", "25"))
+MAX_WAITERS_PER_SLOT = int(os.environ.get("MAX_WAITERS_PER_SLOT", "200"))
+WAITER_PAGE_SIZE     = int(os.environ.get("WAITER_PAGE_SIZE", "25"))
+
+deserializer = TypeDeserializer()
+
+
+def from_image(image):
+    return {k: deserializer.deserialize(v) for k, v in (image or {}).items()}
+
+
+def freed_slots(records):
+    """
+    (tenant, room_id, date) triples where a stream batch released booked
+    time, in stream order, mapped to [sequence number of the first record
+    that freed it, earliest freed start, latest freed end, IDs of the
+    bookings that freed it].
+    """
+    slots = {}
+    for record in records:
+        change = record.get("dynamodb", {})
+        old = from_image(change.get("OldImage"))
+        if not all(old.get(k) for k in ("tenant_id", "room_id", "date", "start_time", "end_time")):
+            # Items from before multi-tenancy are only removed by the migration
+            continue
+        if record["eventName"] == "MODIFY":
+            new = from_image(change.get("NewImage"))
+            moved = (new.get("tenant_id"), new.get("room_id"), new.get("date")) != \
+                    (old["tenant_id"], old["room_id"], old["date"])
+            shortened = new.get("start_time", "") > old["start_time"] or new.get("end_time", "") < old["end_time"]
+            if not (moved or shortened):
+                continue
+        elif record["eventName"] != "REMOVE":
+            continue
+        slot = (old["tenant_id"], old["room_id"], old["date"])
+        if slot in slots:
+            freed = slots[slot]
+            freed[1], freed[2] = min(freed[1], old["start_time"]), max(freed[2], old["end_time"])
+            if old["id"] not in freed[3]:
+                freed[3].append(old["id"])
+        else:
+            slots[slot] = [change.get("SequenceNumber"), old["start_time"], old["end_time"], [old["id"]]]
+    return slots
+
+
+def overlaps(intervals, start_time, end_time):
+    return any(start < end_time and end > start_time for start, end in intervals)
+
+
+def overlapping_waiters(tenant, room_id, date, freed_start, freed_end):
+    """
+    Waiters for the room and date whose request overlaps the freed time (or
+    its cleanup buffer), in promotion order. Returns (waiters, complete);
+    complete is False when MAX_WAITERS_PER_SLOT were read without reaching
+    the end of the queue.
+    """
+    # Buffers kept the freed booking from clashing with waiters just outside it
+    window_start, window_duration = booking.POLICY.buffered_window(
+        tenant, freed_start, to_minutes(freed_end) - to_minutes(freed_start)
+    )
+    kwargs = {
+        "KeyConditionExpression": "slot_key = :slot",
+        "FilterExpression": "start_time < :end AND end_time > :start",
+        "ExpressionAttributeValues": {
+            ":slot": booking.waitlist_slot_key(tenant, room_id, date),
+            ":start": window_start,
+            ":end": from_minutes(to_minutes(window_start) + window_duration)
+        },
+        "Limit": WAITER_PAGE_SIZE
+    }
+    waiters, read = [], 0
+    while True:
+        page = booking.waitlist_table.query(**kwargs)
+        waiters.extend(page["Items"])
+        read += page.get("ScannedCount", len(page["Items"]))
+        if "LastEvaluatedKey" not in page:
+            return waiters, True
+        if read >= MAX_WAITERS_PER_SLOT:
+            return waiters, False
+        kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+
+def promote_waiters(tenant, room_id, date, freed_start, freed_end):
+    """Promote waiters into [freed_start, freed_end). Returns (promoted, complete)."""
+    waiters, complete = overlapping_waiters(tenant, room_id, date, freed_start, freed_end)
+    if not waiters:
+        return 0, complete
+
+    # One read of the day's bookings answers every room and attendee check below
+    day = list(booking.bookings_on(tenant, date, projection=["room_id", "start_time", "end_time", "attendees"]))
+    room_busy = [(b["start_time"], b["end_time"]) for b in day if b["room_id"] == room_id]
+    staff_busy = {}
+    for b in day:
+        for staff_id in b.get("attendees", []):
+            staff_busy.setdefault(staff_id, []).append((b["start_time"], b["end_time"]))
+
+    promoted = 0
+    for waiter in waiters:
+        start, end = waiter["start_time"], waiter["end_time"]
+        duration = to_minutes(end) - to_minutes(start)
+        if booking.POLICY.check(tenant, date, start, duration, room_id):
+            # The slot has started, or the rules no longer allow it; this waiter can't be served
+            booking.waitlist_table.delete_item(Key={"slot_key": waiter["slot_key"], "waiter_key": waiter["waiter_key"]})
+            continue
+        # The room needs its cleanup buffer free as well, as in book_meeting
+        window_start, window_duration = booking.POLICY.buffered_window(tenant, start, duration, room_id)
+        if overlaps(room_busy, window_start, from_minutes(to_minutes(window_start) + window_duration)):
+            continue
+        if any(overlaps(staff_busy.get(staff_id, []), start, end) for staff_id in waiter["attendees"]):
+            continue
+
+        try:
+            # Written with the room's schedule, as in book_meeting, so a
+            # concurrent booking request can't take the same time
+            written = booking.write_booking(tenant, {
+                "id": waiter["booking_id"],
+                "tenant_id": tenant,
+                "tenant_date": booking.write_partition(tenant, date, room_id),
+                "room_id": room_id,
+                "date": date,
+                "start_time": start,
+                "end_time": end,
+                "attendees": waiter["attendees"]
+            }, window_start, window_duration, overwrite=False)
+        except booking.BookingExists:
+            # A retry of the original request already booked it; only the waiter is left
+            booking.waitlist_table.delete_item(Key={"slot_key": waiter["slot_key"], "waiter_key": waiter["waiter_key"]})
+            continue
+        if not written:
+            # Booked by someone else since the day was read
+            continue
+        booking.waitlist_table.delete_item(Key={"slot_key": waiter["slot_key"], "waiter_key": waiter["waiter_key"]})
+
+        room_busy.append((start, end))
+        for staff_id in waiter["attendees"]:
+            staff_busy.setdefault(staff_id, []).append((start, end))
+        promoted += 1
+    return promoted, complete
+
+
+def lambda_handler(event, context):
+    slots = freed_slots(event.get("Records", []))
+    failures = []
+    done = promoted = 0
+    for (tenant, room_id, date), (sequence_number, freed_start, freed_end, booking_ids) in slots.items():
+        if done == MAX_SLOTS_PER_BATCH:
+            failures.append({"itemIdentifier": sequence_number})
+            break
+        try:
+            for booking_id in booking_ids:
+                booking.release_booking(tenant, room_id, date, booking_id)
+            count, complete = promote_waiters(tenant, room_id, date, freed_start, freed_end)
+        except Exception as e:
+            print(f"Waitlist matcher failed for {tenant} room {room_id} on {date}: {e}")
+            failures.append({"itemIdentifier": sequence_number})
+            break
+        promoted += count
+        if not complete:
+            # More waiters than one invocation reads; retry from this record
+            print(f"Waitlist matcher stopped after {MAX_WAITERS_PER_SLOT} waiters for {tenant} room {room_id} on {date}")
+            failures.append({"itemIdentifier": sequence_number})
+            break
+        done += 1
+    return {"batchItemFailures": failures, "slots": done, "promoted": promoted}
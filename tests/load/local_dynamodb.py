@@ -0,0 +1,487 @@
+"""
+In-memory stand-in for the boto3 DynamoDB ``Table`` resource used by the
+Lambda functions, for local load testing.
+
+Supports the calls and expression syntax the Lambdas use (scan, query,
+get/put/update/delete_item, batch_writer, Segment/TotalSegments, Limit
+with LastEvaluatedKey paging) and simulates provisioned capacity, so
+over-capacity calls fail with the same
+``ProvisionedThroughputExceededException`` the real service raises.
+"""
+import copy
+import json
+import math
+import re
+import threading
+import time
+import zlib
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+
+def client_error(code, message, operation):
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+def to_dynamo(value):
+    # DynamoDB hands numbers back as Decimal
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+    if isinstance(value, list):
+        return [to_dynamo(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_dynamo(v) for k, v in value.items()}
+    return value
+
+
+def item_size(item):
+    return len(json.dumps(item, default=str))
+
+
+# ─── Expression evaluation ───────────────────────────────
+
+TOKEN = re.compile(r"\s*(<>|<=|>=|=|<|>|\(|\)|,|:[\w]+|#[\w]+|[A-Za-z_][\w.]*)")
+KEYWORDS = {"AND", "OR", "NOT", "BETWEEN", "IN"}
+FUNCTIONS = {
+    "attribute_exists":     lambda a: a is not MISSING,
+    "attribute_not_exists": lambda a: a is MISSING,
+    "begins_with":          lambda a, b: isinstance(a, str) and a.startswith(b),
+    "contains":             lambda a, b: a is not MISSING and b in a,
+    "size":                 lambda a: 0 if a is MISSING else len(a),
+}
+COMPARATORS = {
+    "=":  lambda a, b: a == b,
+    "<>": lambda a, b: a != b,
+    "<":  lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">":  lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+MISSING = object()
+
+
+def tokenize(expression):
+    tokens, pos = [], 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = TOKEN.match(expression, pos)
+        if not match:
+            raise ValueError(f"Cannot parse expression near: {expression[pos:]!r}")
+        tokens.append(match.group(1))
+        pos = match.end()
+    return tokens
+
+
+class ExpressionParser:
+    """Compiles a condition expression into ``fn(item, values) -> bool``."""
+
+    def __init__(self, expression, names):
+        self.tokens = tokenize(expression)
+        self.names = names or {}
+        self.pos = 0
+
+    def parse(self):
+        fn = self.parse_or()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected token {self.tokens[self.pos]!r}")
+        return fn
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if expected is not None and (token or "").upper() != expected:
+            raise ValueError(f"Expected {expected}, got {token!r}")
+        self.pos += 1
+        return token
+
+    def parse_or(self):
+        left = self.parse_and()
+        while (self.peek() or "").upper() == "OR":
+            self.take()
+            right = self.parse_and()
+            left = (lambda l, r: lambda item, values: l(item, values) or r(item, values))(left, right)
+        return left
+
+    def parse_and(self):
+        left = self.parse_not()
+        while (self.peek() or "").upper() == "AND":
+            self.take()
+            right = self.parse_not()
+            left = (lambda l, r: lambda item, values: l(item, values) and r(item, values))(left, right)
+        return left
+
+    def parse_not(self):
+        if (self.peek() or "").upper() == "NOT":
+            self.take()
+            inner = self.parse_not()
+            return lambda item, values: not inner(item, values)
+        return self.parse_condition()
+
+    def parse_condition(self):
+        if self.peek() == "(":
+            self.take()
+            inner = self.parse_or()
+            self.take(")")
+            return inner
+
+        left = self.parse_operand()
+        token = self.peek()
+        if token in COMPARATORS:
+            self.take()
+            right = self.parse_operand()
+            compare = COMPARATORS[token]
+
+            def comparison(item, values):
+                a, b = left(item, values), right(item, values)
+                if a is MISSING or b is MISSING:
+                    return False
+                try:
+                    return compare(a, b)
+                except TypeError:
+                    return False
+            return comparison
+
+        if (token or "").upper() == "BETWEEN":
+            self.take()
+            low = self.parse_operand()
+            self.take("AND")
+            high = self.parse_operand()
+
+            def between(item, values):
+                a = left(item, values)
+                if a is MISSING:
+                    return False
+                try:
+                    return low(item, values) <= a <= high(item, values)
+                except TypeError:
+                    return False
+            return between
+
+        # A bare function call such as contains(...) is itself a condition
+        return lambda item, values: bool(left(item, values))
+
+    def parse_operand(self):
+        token = self.take()
+        if token in FUNCTIONS and self.peek() == "(":
+            self.take("(")
+            args = [self.parse_operand()]
+            while self.peek() == ",":
+                self.take()
+                args.append(self.parse_operand())
+            self.take(")")
+            fn = FUNCTIONS[token]
+            return lambda item, values: fn(*(arg(item, values) for arg in args))
+        if token.startswith(":"):
+            return lambda item, values: values[token]
+        return self.path(token)
+
+    def path(self, token):
+        parts = [self.names.get(p, p) for p in token.split(".")]
+
+        def get(item, values):
+            value = item
+            for part in parts:
+                if not isinstance(value, dict) or part not in value:
+                    return MISSING
+                value = value[part]
+            return value
+        return get
+
+
+_compiled = {}
+
+
+def compile_condition(expression, names):
+    key = (expression, tuple(sorted((names or {}).items())))
+    if key not in _compiled:
+        _compiled[key] = ExpressionParser(expression, names).parse()
+    return _compiled[key]
+
+
+def project(item, projection, names):
+    if not projection:
+        return item
+    fields = [names.get(f.strip(), f.strip()) if names else f.strip() for f in projection.split(",")]
+    return {f: item[f] for f in fields if f in item}
+
+
+# ─── Capacity ────────────────────────────────────────────
+
+class TokenBucket:
+    def __init__(self, rate, burst_seconds=1.0):
+        self.rate = rate
+        self.capacity = rate * burst_seconds if rate else 0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, units):
+        if not self.rate:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Like DynamoDB, a request is admitted while there is any capacity left
+            if self.tokens <= 0:
+                return False
+            self.tokens -= units
+            return True
+
+
+# ─── Table ───────────────────────────────────────────────
+
+class LocalTable:
+    """
+    Thread-safe in-memory table.
+
+    ``read_capacity``/``write_capacity`` are units per second (0 = unlimited).
+    ``latency_ms`` is added to every call and ``latency_ms_per_mb`` to reads,
+    approximating network and service time.
+    """
+
+    def __init__(self, name, key_schema, indexes=None, read_capacity=0, write_capacity=0,
+                 latency_ms=0.0, latency_ms_per_mb=0.0):
+        self.name = name
+        self.table_name = name
+        self.key_schema = tuple(key_schema) if isinstance(key_schema, (list, tuple)) else (key_schema,)
+        self.indexes = indexes or {}
+        self.items = {}
+        self.lock = threading.RLock()
+        self.reads = TokenBucket(read_capacity)
+        self.writes = TokenBucket(write_capacity)
+        self.latency_ms = latency_ms
+        self.latency_ms_per_mb = latency_ms_per_mb
+        self.stats = {"calls": 0, "throttled": 0, "read_units": 0.0, "write_units": 0.0}
+        self.stats_lock = threading.Lock()
+
+    # Helpers
+
+    def key_of(self, item):
+        return tuple(item[k] for k in self.key_schema)
+
+    def account(self, operation, read_units=0.0, write_units=0.0, scanned_bytes=0):
+        with self.stats_lock:
+            self.stats["calls"] += 1
+        bucket, units = (self.writes, write_units) if write_units else (self.reads, read_units)
+        if not bucket.consume(units):
+            with self.stats_lock:
+                self.stats["throttled"] += 1
+            raise client_error(
+                "ProvisionedThroughputExceededException",
+                f"The level of configured provisioned throughput for the table {self.name} was exceeded.",
+                operation
+            )
+        with self.stats_lock:
+            self.stats["read_units"] += read_units
+            self.stats["write_units"] += write_units
+        delay = self.latency_ms + self.latency_ms_per_mb * scanned_bytes / (1024 * 1024)
+        if delay:
+            time.sleep(delay / 1000.0)
+
+    def check_condition(self, existing, condition, names, values, operation):
+        if not condition:
+            return
+        if not compile_condition(condition, names)(existing or {}, values or {}):
+            raise client_error("ConditionalCheckFailedException", "The conditional request failed", operation)
+
+    # Item operations
+
+    def get_item(self, Key, ConsistentRead=False, ProjectionExpression=None, ExpressionAttributeNames=None):
+        with self.lock:
+            item = self.items.get(self.key_of(Key))
+            item = copy.deepcopy(item) if item is not None else None
+        size = item_size(item) if item else 1
+        self.account("GetItem", read_units=math.ceil(size / 4096) * (1.0 if ConsistentRead else 0.5))
+        if item is None:
+            return {}
+        return {"Item": project(item, ProjectionExpression, ExpressionAttributeNames)}
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, **kwargs):
+        item = to_dynamo(copy.deepcopy(Item))
+        self.account("PutItem", write_units=math.ceil(item_size(item) / 1024))
+        with self.lock:
+            key = self.key_of(item)
+            self.check_condition(self.items.get(key), ConditionExpression,
+                                 ExpressionAttributeNames, ExpressionAttributeValues, "PutItem")
+            self.items[key] = item
+        return {}
+
+    def delete_item(self, Key, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues=None, **kwargs):
+        self.account("DeleteItem", write_units=1)
+        with self.lock:
+            key = self.key_of(Key)
+            existing = self.items.get(key)
+            self.check_condition(existing, ConditionExpression,
+                                 ExpressionAttributeNames, ExpressionAttributeValues, "DeleteItem")
+            self.items.pop(key, None)
+        if ReturnValues == "ALL_OLD" and existing is not None:
+            return {"Attributes": copy.deepcopy(existing)}
+        return {}
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues=None, **kwargs):
+        names = ExpressionAttributeNames or {}
+        values = to_dynamo(ExpressionAttributeValues or {})
+        self.account("UpdateItem", write_units=1)
+        with self.lock:
+            key = self.key_of(Key)
+            existing = self.items.get(key)
+            self.check_condition(existing, ConditionExpression, names, values, "UpdateItem")
+            item = copy.deepcopy(existing) if existing is not None else dict(Key)
+            for action, body in re.findall(r"(SET|REMOVE)\s+(.*?)(?=\s+(?:SET|REMOVE)\s+|$)", UpdateExpression.strip()):
+                for clause in body.split(","):
+                    if action == "SET":
+                        path, value = (part.strip() for part in clause.split("=", 1))
+                        item[names.get(path, path)] = values[value]
+                    else:
+                        item.pop(names.get(clause.strip(), clause.strip()), None)
+            self.items[key] = item
+        if ReturnValues == "ALL_NEW":
+            return {"Attributes": copy.deepcopy(item)}
+        return {}
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return LocalBatchWriter(self)
+
+    # Reads
+
+    def _read(self, operation, candidates, key_schema, ExclusiveStartKey=None, FilterExpression=None,
+              ProjectionExpression=None, ExpressionAttributeNames=None, ExpressionAttributeValues=None, Limit=None):
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        matches = compile_condition(FilterExpression, names) if FilterExpression else None
+        if ExclusiveStartKey:
+            start = self.key_of(ExclusiveStartKey)
+            keys = [self.key_of(item) for item in candidates]
+            candidates = candidates[keys.index(start) + 1:] if start in keys else candidates
+        # Like DynamoDB, Limit caps the items evaluated, before the filter is applied
+        page = candidates[:Limit] if Limit else candidates
+        scanned_bytes, result = 0, []
+        for item in page:
+            scanned_bytes += item_size(item)
+            if matches is None or matches(item, values):
+                result.append(project(copy.deepcopy(item), ProjectionExpression, names))
+        self.account(operation, read_units=max(0.5, math.ceil(scanned_bytes / 4096) * 0.5),
+                     scanned_bytes=scanned_bytes)
+        response = {"Items": result, "Count": len(result), "ScannedCount": len(page)}
+        if len(page) < len(candidates):
+            last = page[-1]
+            response["LastEvaluatedKey"] = {k: last[k] for k in dict.fromkeys(self.key_schema + tuple(key_schema))}
+        return response
+
+    def scan(self, Segment=None, TotalSegments=None, IndexName=None, ExclusiveStartKey=None, **kwargs):
+        with self.lock:
+            candidates = list(self.items.values())
+        if IndexName:
+            candidates = [i for i in candidates if all(k in i for k in self.indexes[IndexName])]
+        if TotalSegments:
+            candidates = [
+                i for i in candidates
+                if zlib.crc32(repr(self.key_of(i)).encode()) % TotalSegments == Segment
+            ]
+        return self._read("Scan", candidates, self.key_schema, ExclusiveStartKey=ExclusiveStartKey, **kwargs)
+
+    def query(self, KeyConditionExpression, IndexName=None, ScanIndexForward=True,
+              ExclusiveStartKey=None, ExpressionAttributeNames=None, ExpressionAttributeValues=None, **kwargs):
+        key_schema = self.indexes[IndexName] if IndexName else self.key_schema
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        key_condition = compile_condition(KeyConditionExpression, names)
+        with self.lock:
+            candidates = [
+                i for i in self.items.values()
+                if all(k in i for k in key_schema) and key_condition(i, values)
+            ]
+        if len(key_schema) > 1:
+            candidates.sort(key=lambda i: i[key_schema[1]], reverse=not ScanIndexForward)
+        return self._read("Query", candidates, key_schema, ExclusiveStartKey=ExclusiveStartKey,
+                          ExpressionAttributeNames=names, ExpressionAttributeValues=values, **kwargs)
+
+
+class LocalBatchWriter:
+    def __init__(self, table):
+        self.table = table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def put_item(self, Item):
+        self.table.put_item(Item=Item)
+
+    def delete_item(self, Key):
+        self.table.delete_item(Key=Key)
+
+
+class LocalClient:
+    """
+    The client operations the Lambdas use directly, over local tables.
+    ``transact_write_items`` (Put and Delete) holds every involved table's
+    lock, checks all conditions and then applies all writes, or raises
+    TransactionCanceledException with per-item CancellationReasons.
+    """
+
+    def __init__(self, tables):
+        self.tables = {table.table_name: table for table in tables.values()}
+
+    def transact_write_items(self, TransactItems):
+        actions = []
+        for entry in TransactItems:
+            (action, request), = entry.items()
+            table = self.tables[request["TableName"]]
+            item = to_dynamo(copy.deepcopy(request["Item"])) if action == "Put" else None
+            # Transactions cost twice the units of the plain writes
+            table.account("TransactWriteItems", write_units=2 * math.ceil(item_size(item) / 1024) if item else 2)
+            actions.append((action, table, table.key_of(item or request["Key"]), item, request))
+        involved = sorted({table.table_name: table for _, table, _, _, _ in actions}.items())
+        for _, table in involved:
+            table.lock.acquire()
+        try:
+            reasons = []
+            for action, table, key, item, request in actions:
+                try:
+                    table.check_condition(table.items.get(key), request.get("ConditionExpression"),
+                                          request.get("ExpressionAttributeNames"),
+                                          request.get("ExpressionAttributeValues"), "TransactWriteItems")
+                    reasons.append({"Code": "None"})
+                except ClientError:
+                    reasons.append({"Code": "ConditionalCheckFailed", "Message": "The conditional request failed"})
+            if any(reason["Code"] != "None" for reason in reasons):
+                error = client_error("TransactionCanceledException",
+                                     "Transaction cancelled, please refer cancellation reasons for specific reasons",
+                                     "TransactWriteItems")
+                error.response["CancellationReasons"] = reasons
+                raise error
+            for action, table, key, item, request in actions:
+                if action == "Put":
+                    table.items[key] = item
+                else:
+                    table.items.pop(key, None)
+        finally:
+            for _, table in reversed(involved):
+                table.lock.release()
+        return {}
+
+
+def install(module, tables):
+    """
+    Point a Lambda module's ``<name>_table`` globals at local tables,
+    e.g. ``install(unified_lambda, {"bookings": LocalTable(...)})``, and its
+    ``dynamodb_client``, if it has one, at a LocalClient over them.
+    """
+    for name, table in tables.items():
+        attribute = f"{name}_table"
+        if hasattr(module, attribute):
+            setattr(module, attribute, table)
+    if hasattr(module, "dynamodb_client"):
+        module.dynamodb_client = LocalClient(tables)
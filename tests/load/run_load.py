@@ -0,0 +1,514 @@
+"""
+Local load generator for the booking Lambda.
+
+Drives ``unified_lambda.lambda_handler`` in-process with Lex V2 booking
+conversations and API Gateway ``GET /bookings`` dashboard polls, against
+in-memory DynamoDB tables with simulated capacity and latency.
+
+    python -m tests.load.run_load --bookers 200 --dashboards 500 --duration 60
+    python -m tests.load.run_load --out after.json --compare before.json
+
+Bookers arrive as a Poisson process (``--arrival-rate`` sessions/s) and are
+served by ``--bookers`` concurrent workers; each session checks availability
+and then books. Dashboards poll every ``--poll-interval`` seconds like
+``App.jsx``; ``--time-scale`` compresses that interval so a short local run
+still sees many polls. Latency is measured from each request's scheduled
+start, so time spent waiting for a free worker counts against it.
+
+Traffic is spread over ``--tenants`` offices, each with its own copy of the
+directory; ``--hot-tenant-share`` of it goes to the first office so one
+noisy tenant can be compared against the rest (operations on it are
+reported with a ``[hot]`` suffix). ``--tenant-rate`` enables the Lambda's
+per-tenant throttle.
+"""
+import argparse
+import heapq
+import importlib
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from boto3.dynamodb.types import TypeSerializer
+
+from .local_dynamodb import LocalTable, install
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+LAMBDA_DIR = os.path.join(ROOT, "lambda")
+if LAMBDA_DIR not in sys.path:
+    sys.path.insert(0, LAMBDA_DIR)
+
+FIRST_NAMES = ["Alice", "Bob", "Carol", "Dave", "Erin", "Frank", "Grace", "Heidi", "Ivan", "Judy",
+               "Mallory", "Niaj", "Olivia", "Peggy", "Rupert", "Sybil", "Trent", "Victor", "Walter", "Yara"]
+LAST_NAMES = ["Johnson", "Smith", "Brown", "Jones", "Garcia", "Miller", "Davis", "Lopez", "Wilson", "Moore"]
+
+serializer = TypeSerializer()
+sequence_numbers = itertools.count(1)
+
+
+# ─── Setup ───────────────────────────────────────────────
+
+def make_tables(args):
+    table_kwargs = {"latency_ms": args.latency_ms, "latency_ms_per_mb": args.latency_ms_per_mb}
+    # Same GSIs as the CDK stack
+    tenant_index = {"TenantIndex": ("tenant_id",)}
+    return {
+        "bookings": LocalTable("BookingsTable", "id", read_capacity=args.read_capacity,
+                               write_capacity=args.write_capacity,
+                               indexes={"TenantDateIndex": ("tenant_date", "start_time")},
+                               **table_kwargs),
+        "rooms":    LocalTable("RoomsTable", "room_id", indexes=tenant_index, **table_kwargs),
+        "staff":    LocalTable("StaffTable", "staff_id", indexes=tenant_index, **table_kwargs),
+        "dedup":    LocalTable("DedupTable", "idempotency_key", **table_kwargs),
+        "waitlist": LocalTable("WaitlistTable", ("slot_key", "waiter_key"), **table_kwargs),
+        "schedule": LocalTable("ScheduleTable", "room_day", **table_kwargs),
+    }
+
+
+def tenant_names(args):
+    return [f"office-{n}" for n in range(1, max(1, args.tenants) + 1)]
+
+
+def seed(tables, args, rng):
+    # Imported here: tenancy reads the tenant configuration set by configure_env
+    from tenancy import tenant_item
+
+    with open(os.path.join(LAMBDA_DIR, "sample_data.json")) as f:
+        sample = json.load(f)
+
+    rooms = list(sample["rooms"])
+    equipment = ["projector", "video conferencing", "whiteboard"]
+    for n in range(len(rooms) + 1, args.rooms + 1):
+        rooms.append({
+            "room_id": str(n),
+            "room_name": f"Room {n}",
+            "capacity": rng.choice([4, 6, 8, 12, 20]),
+            "building": "HQ",
+            "floor": rng.randint(1, 5),
+            "equipment": rng.sample(equipment, rng.randint(0, len(equipment)))
+        })
+
+    staff = list(sample["staff"])
+    for n in range(len(staff) + 1, args.staff + 1):
+        staff.append({
+            "staff_id": str(n),
+            "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {n}"
+        })
+
+    # Every office gets the same directory under its own tenant prefix
+    tenants = tenant_names(args)
+    for tenant in tenants:
+        for room in rooms:
+            tables["rooms"].put_item(Item=tenant_item("rooms", tenant, room))
+        for person in staff:
+            tables["staff"].put_item(Item=tenant_item("staff", tenant, person))
+
+    # Historical bookings give every tenant a realistic amount of data
+    for _ in range(args.seed_bookings):
+        start = rng.randrange(8 * 60, 17 * 60, 30)
+        tables["bookings"].put_item(Item=tenant_item("bookings", rng.choice(tenants), {
+            "id": str(uuid.uuid4()),
+            "room_id": rng.choice(rooms)["room_id"],
+            "date": (date.today() - timedelta(days=rng.randint(1, 365))).isoformat(),
+            "start_time": f"{start // 60:02d}:{start % 60:02d}",
+            "end_time": f"{(start + 60) // 60:02d}:{(start + 60) % 60:02d}",
+            "attendees": [p["staff_id"] for p in rng.sample(staff, 2)]
+        }))
+    return tenants, rooms, staff
+
+
+def api_key_id(tenant):
+    return f"loadtest-key-{tenant}"
+
+
+def configure_env(args):
+    """Lambda environment, as the CDK stack sets it; must run before the Lambda modules are imported."""
+    tenants = tenant_names(args)
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("BOOKINGS_TABLE", "BookingsTable")
+    os.environ.setdefault("ROOMS_TABLE", "RoomsTable")
+    os.environ.setdefault("STAFF_TABLE", "StaffTable")
+    os.environ.setdefault("DEDUP_TABLE", "DedupTable")
+    os.environ.setdefault("WAITLIST_TABLE", "WaitlistTable")
+    os.environ.setdefault("SCHEDULE_TABLE", "ScheduleTable")
+    os.environ["DEFAULT_TENANT"] = tenants[0]
+    os.environ["TENANTS"] = ",".join(tenants)
+    os.environ["TENANT_API_KEYS"] = json.dumps({tenant: api_key_id(tenant) for tenant in tenants})
+    os.environ["TENANT_RATE"] = str(args.tenant_rate)
+
+
+def load_lambda(tables):
+    module = importlib.import_module("unified_lambda")
+    install(module, tables)
+    return module, importlib.import_module("waitlist_matcher")
+
+
+def cancel_booking(tables, rng, created):
+    """
+    Delete one booking made during the run and return the stream event
+    DynamoDB would deliver for it, or None if there is nothing to cancel.
+    """
+    ids = list(created)
+    if not ids:
+        return None
+    booking_id = rng.choice(ids)
+    old = tables["bookings"].delete_item(Key={"id": booking_id}, ReturnValues="ALL_OLD").get("Attributes")
+    created.discard(booking_id)
+    if old is None:
+        return None
+    return {"Records": [{
+        "eventName": "REMOVE",
+        "eventSource": "aws:dynamodb",
+        "dynamodb": {
+            "SequenceNumber": str(next(sequence_numbers)),
+            "Keys": {"id": serializer.serialize(booking_id)},
+            "OldImage": {k: serializer.serialize(v) for k, v in old.items()},
+            "StreamViewType": "NEW_AND_OLD_IMAGES"
+        }
+    }]}
+
+
+# ─── Events ──────────────────────────────────────────────
+
+def slot(value):
+    if value is None:
+        return None
+    return {"value": {"originalValue": value, "interpretedValue": value, "resolvedValues": [value]}}
+
+
+def lex_event(session_id, tenant, intent, slots, transcript):
+    return {
+        "sessionId": session_id,
+        "inputTranscript": transcript,
+        "invocationSource": "FulfillmentCodeHook",
+        "inputMode": "Text",
+        "messageVersion": "1.0",
+        # Each office talks to the bot through its own alias
+        "bot": {"id": "LOADTEST", "name": "MeetingBookingBot", "aliasId": f"ALIAS-{tenant}",
+                "aliasName": tenant, "localeId": "en_US", "version": "1"},
+        "requestAttributes": {},
+        "sessionState": {
+            "sessionAttributes": {},
+            "intent": {
+                "name": intent,
+                "slots": {name: slot(value) for name, value in slots.items()},
+                "state": "ReadyForFulfillment",
+                "confirmationState": "None"
+            }
+        }
+    }
+
+
+def http_event(method, path, tenant, query=None, headers=None):
+    # API Gateway passes the ID of the (validated) API key the office called with
+    return {
+        "resource": path,
+        "path": path,
+        "httpMethod": method,
+        "headers": headers or {},
+        "queryStringParameters": query,
+        "requestContext": {"requestId": str(uuid.uuid4()), "stage": "prod",
+                           "identity": {"apiKeyId": api_key_id(tenant)}},
+        "body": None,
+        "isBase64Encoded": False
+    }
+
+
+def dashboard_event(args, tenant):
+    if args.dashboard_format == "columnar":
+        # What App.jsx requests
+        return http_event("GET", "/prod/bookings", tenant,
+                          query={"fields": "id,room_id,date,start_time,end_time,attendees"},
+                          headers={"Accept": "application/vnd.bookings.columnar+json"})
+    return http_event("GET", "/prod/bookings", tenant)
+
+
+def pick_tenant(rng, tenants, args):
+    if len(tenants) == 1 or rng.random() < args.hot_tenant_share:
+        return tenants[0]
+    return rng.choice(tenants[1:])
+
+
+def label(operation, tenant, tenants):
+    return f"{operation} [hot]" if len(tenants) > 1 and tenant == tenants[0] else operation
+
+
+def booking_session(rng, tenant, rooms, staff, args):
+    """One user's conversation: check a slot, then book it."""
+    session_id = str(uuid.uuid4())
+    day = (date.today() + timedelta(days=rng.randint(1, args.days))).isoformat()
+    start = rng.randrange(8 * 60, 17 * 60 + 30, 30)
+    start_time = f"{start // 60:02d}:{start % 60:02d}"
+    room = None if rng.random() < args.auto_room_ratio else rng.choice(rooms)["room_name"]
+    people = rng.sample(staff, rng.randint(1, 4))
+    attendees = ", ".join(p["full_name"] for p in people)
+
+    events = []
+    if room is not None:
+        events.append(("lex:CheckAvailability", lex_event(session_id, tenant, "CheckAvailability", {
+            "Room": room, "CheckDate": day, "CheckTime": start_time
+        }, f"is {room} free on {day} at {start_time}")))
+    events.append(("lex:BookMeeting", lex_event(session_id, tenant, "BookMeeting", {
+        "MeetingDate": day, "MeetingTime": start_time, "Duration": str(rng.choice([30, 60])),
+        "Room": room, "Attendees": attendees
+    }, f"book {room or 'a room'} on {day} at {start_time}")))
+    # Lex/API Gateway retries re-deliver the identical event
+    if rng.random() < args.retry_ratio:
+        events.append(("lex:BookMeeting (retry)", events[-1][1]))
+    return events
+
+
+# ─── Measurement ─────────────────────────────────────────
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.response_bytes = defaultdict(int)
+
+    def record(self, operation, latency, ok, size=0):
+        with self.lock:
+            self.latencies[operation].append(latency)
+            self.response_bytes[operation] += size
+            if not ok:
+                self.errors[operation] += 1
+
+
+def is_ok(operation, response):
+    if operation.startswith("http:"):
+        return response.get("statusCode") == 200
+    content = response["messages"][0]["content"]
+    return content != "Sorry, something went wrong." and "Too many requests" not in content
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def find_violations(bookings, new_ids):
+    """
+    Overlapping bookings of the same room, or of the same person, on the
+    same date within a tenant, where at least one of the pair was made
+    during the run.
+    """
+    by_room, by_person = defaultdict(list), defaultdict(list)
+    for b in bookings:
+        by_room[(b["tenant_id"], b["room_id"], b["date"])].append(b)
+        for person in b.get("attendees", []):
+            by_person[(b["tenant_id"], person, b["date"])].append(b)
+
+    def overlaps(groups):
+        count = 0
+        for group in groups.values():
+            group.sort(key=lambda b: b["start_time"])
+            for i, first in enumerate(group):
+                for second in group[i + 1:]:
+                    if second["start_time"] >= first["end_time"]:
+                        break
+                    if first["id"] in new_ids or second["id"] in new_ids:
+                        count += 1
+        return count
+
+    return {"room_double_bookings": overlaps(by_room), "attendee_double_bookings": overlaps(by_person)}
+
+
+# ─── Run ─────────────────────────────────────────────────
+
+def run(args):
+    rng = random.Random(args.seed)
+    tables = make_tables(args)
+    configure_env(args)
+    tenants, rooms, staff = seed(tables, args, rng)
+    seeded = set(tables["bookings"].items)
+    module, matcher = load_lambda(tables)
+    recorder = Recorder()
+    created = set()
+    created_lock = threading.Lock()
+    promotions = [0]
+
+    def invoke(operation, event, scheduled):
+        size = 0
+        try:
+            response = module.lambda_handler(event, None)
+            ok = is_ok(operation, response)
+            size = len(response.get("body") or "")
+        except Exception:
+            ok = False
+        recorder.record(operation, time.monotonic() - scheduled, ok, size)
+
+    def run_cancel(scheduled):
+        with created_lock:
+            created.update(k[0] for k in tables["bookings"].items if k not in seeded)
+            stream_event = cancel_booking(tables, rng, created)
+        if stream_event is None:
+            return
+        try:
+            promoted = matcher.lambda_handler(stream_event, None)["promoted"]
+            with created_lock:
+                promotions[0] += promoted
+            ok = True
+        except Exception:
+            ok = False
+        recorder.record("stream:cancel", time.monotonic() - scheduled, ok)
+
+    def run_session(events, scheduled):
+        for operation, event in events:
+            invoke(operation, event, scheduled)
+            scheduled = time.monotonic()
+
+    started = time.monotonic()
+    deadline = started + args.duration
+    poll_interval = args.poll_interval / args.time_scale
+
+    # (due time, kind, dashboard number)
+    schedule = [(started + rng.uniform(0, poll_interval), "poll", n) for n in range(args.dashboards)]
+    if args.arrival_rate > 0:
+        schedule.append((started + rng.expovariate(args.arrival_rate), "session", None))
+    if args.cancel_rate > 0:
+        schedule.append((started + rng.expovariate(args.cancel_rate), "cancel", None))
+    heapq.heapify(schedule)
+
+    booker_pool = ThreadPoolExecutor(max_workers=max(1, args.bookers))
+    dashboard_pool = ThreadPoolExecutor(max_workers=max(1, args.dashboard_workers))
+    while schedule:
+        due, kind, n = heapq.heappop(schedule)
+        if due >= deadline:
+            break
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if kind == "poll":
+            # Each dashboard belongs to one office
+            tenant = tenants[0] if n < args.dashboards * args.hot_tenant_share else tenants[n % len(tenants)]
+            dashboard_pool.submit(invoke, label("http:GET /bookings", tenant, tenants),
+                                  dashboard_event(args, tenant), due)
+            heapq.heappush(schedule, (due + poll_interval, "poll", n))
+        elif kind == "cancel":
+            booker_pool.submit(run_cancel, due)
+            heapq.heappush(schedule, (due + rng.expovariate(args.cancel_rate), "cancel", None))
+        else:
+            tenant = pick_tenant(rng, tenants, args)
+            events = [(label(operation, tenant, tenants), event)
+                      for operation, event in booking_session(rng, tenant, rooms, staff, args)]
+            booker_pool.submit(run_session, events, due)
+            heapq.heappush(schedule, (due + rng.expovariate(args.arrival_rate), "session", None))
+    booker_pool.shutdown(wait=True)
+    dashboard_pool.shutdown(wait=True)
+    elapsed = time.monotonic() - started
+
+    operations = {}
+    for operation, latencies in sorted(recorder.latencies.items()):
+        latencies.sort()
+        operations[operation] = {
+            "count": len(latencies),
+            "errors": recorder.errors[operation],
+            "avg_response_bytes": recorder.response_bytes[operation] // len(latencies),
+            "throughput_per_s": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2)
+        }
+
+    all_bookings = list(tables["bookings"].items.values())
+    made = {b["id"] for k, b in tables["bookings"].items.items() if k not in seeded}
+    return {
+        "config": vars(args),
+        "elapsed_seconds": round(elapsed, 2),
+        "operations": operations,
+        "tables": {name: dict(table.stats, items=len(table.items)) for name, table in tables.items()},
+        "bookings_created": len(made),
+        "waitlist_promotions": promotions[0],
+        "violations": find_violations(all_bookings, made)
+    }
+
+
+def print_report(results, baseline=None):
+    def delta(current, previous):
+        if previous in (None, 0) or current is None:
+            return ""
+        return f" ({(current - previous) / previous * 100:+.0f}%)"
+
+    base_ops = (baseline or {}).get("operations", {})
+    print(f"Elapsed: {results['elapsed_seconds']} s")
+    print(f"{'operation':<32}{'count':>8}{'errors':>8}{'req/s':>10}{'p50 ms':>16}{'p95 ms':>16}{'p99 ms':>16}{'max ms':>16}{'avg bytes':>18}")
+    for operation, stats in results["operations"].items():
+        base = base_ops.get(operation, {})
+        row = f"{operation:<32}{stats['count']:>8}{stats['errors']:>8}{stats['throughput_per_s']:>10}"
+        for field in ("p50_ms", "p95_ms", "p99_ms", "max_ms"):
+            row += f"{str(stats[field]) + delta(stats[field], base.get(field)):>16}"
+        row += f"{str(stats['avg_response_bytes']) + delta(stats['avg_response_bytes'], base.get('avg_response_bytes')):>18}"
+        print(row)
+
+    print("Tables:")
+    for name, stats in results["tables"].items():
+        base = (baseline or {}).get("tables", {}).get(name, {})
+        print(f"  {name:<10} calls={stats['calls']} throttled={stats['throttled']}{delta(stats['throttled'], base.get('throttled'))}"
+              f" read_units={stats['read_units']:.0f}{delta(stats['read_units'], base.get('read_units'))}"
+              f" items={stats['items']}")
+    print(f"Bookings created: {results['bookings_created']} (waitlist promotions: {results['waitlist_promotions']})")
+    print(f"Violations: {results['violations']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookers", type=int, default=200, help="concurrent booking sessions")
+    parser.add_argument("--arrival-rate", type=float, default=20.0, help="new booking sessions per second")
+    parser.add_argument("--auto-room-ratio", type=float, default=0.3,
+                        help="fraction of bookings that leave the room for the bot to pick")
+    parser.add_argument("--retry-ratio", type=float, default=0.05,
+                        help="fraction of BookMeeting calls that are delivered twice")
+    parser.add_argument("--cancel-rate", type=float, default=1.0,
+                        help="cancellations per second, each delivered to the waitlist matcher")
+    parser.add_argument("--dashboards", type=int, default=500, help="dashboards polling GET /bookings")
+    parser.add_argument("--dashboard-workers", type=int, default=100, help="concurrent dashboard requests")
+    parser.add_argument("--dashboard-format", choices=["json", "columnar"], default="columnar",
+                        help="GET /bookings representation requested by dashboards")
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="dashboard poll interval in seconds")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="divide poll intervals by this factor")
+    parser.add_argument("--duration", type=float, default=60.0, help="run time in seconds")
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--staff", type=int, default=200)
+    parser.add_argument("--tenants", type=int, default=1, help="offices sharing the tables")
+    parser.add_argument("--hot-tenant-share", type=float, default=0.0,
+                        help="fraction of booking sessions and dashboards belonging to the first office")
+    parser.add_argument("--tenant-rate", type=float, default=0,
+                        help="per-tenant requests/s allowed by the Lambda (0 = unlimited)")
+    parser.add_argument("--days", type=int, default=5, help="bookings are spread over this many days ahead")
+    parser.add_argument("--seed-bookings", type=int, default=2000, help="historical bookings to preload")
+    parser.add_argument("--read-capacity", type=float, default=0, help="bookings table RCU/s (0 = unlimited)")
+    parser.add_argument("--write-capacity", type=float, default=0, help="bookings table WCU/s (0 = unlimited)")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated per-call DynamoDB latency")
+    parser.add_argument("--latency-ms-per-mb", type=float, default=20.0, help="simulated read latency per MB scanned")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON from a previous run to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+# Lambda environment, as the CDK stack sets it; read when the modules are imported
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+for _name in ("BOOKINGS", "ROOMS", "STAFF", "DEDUP", "WAITLIST", "SCHEDULE"):
+    os.environ.setdefault(f"{_name}_TABLE", f"{_name.title()}Table")
+os.environ.setdefault("TENANTS", "acme,globex")
+os.environ["TENANT_RATE"] = "0"
+
+from tests.load.local_dynamodb import LocalTable, install  # noqa: E402
+
+TENANT = "acme"
+
+
+def days_from_today(days):
+    return (datetime.utcnow().date() + timedelta(days=days)).isoformat()
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    """Empty in-memory tables (same keys and indexes as the CDK stack) installed into the booking Lambda."""
+    import unified_lambda
+    from tenancy import LRUCache
+
+    tables = {
+        "bookings": LocalTable("BookingsTable", "id", indexes={"TenantDateIndex": ("tenant_date", "start_time")}),
+        "rooms":    LocalTable("RoomsTable", "room_id", indexes={"TenantIndex": ("tenant_id",)}),
+        "staff":    LocalTable("StaffTable", "staff_id", indexes={"TenantIndex": ("tenant_id",)}),
+        "dedup":    LocalTable("DedupTable", "idempotency_key"),
+        "waitlist": LocalTable("WaitlistTable", ("slot_key", "waiter_key")),
+        "schedule": LocalTable("ScheduleTable", "room_day"),
+    }
+    install(unified_lambda, tables)
+    # Directories cached by an earlier test belong to other tables
+    monkeypatch.setattr(unified_lambda, "_directories", LRUCache(10))
+    return tables
+
+
+@pytest.fixture
+def office(tables):
+    """Tables holding a small directory for TENANT: rooms 1-3 and staff 1-4."""
+    from tenancy import tenant_item
+
+    rooms = [
+        {"room_id": "1", "room_name": "Huddle", "capacity": 4, "building": "HQ", "floor": 1,
+         "equipment": ["whiteboard"]},
+        {"room_id": "2", "room_name": "Board Room", "capacity": 12, "building": "HQ", "floor": 2,
+         "equipment": ["projector", "video conferencing"]},
+        {"room_id": "3", "room_name": "Annex", "capacity": 8, "building": "Annex", "floor": 1,
+         "equipment": ["projector"]},
+    ]
+    staff = [{"staff_id": str(n), "full_name": name}
+             for n, name in enumerate(["Alice Johnson", "Bob Smith", "Carol Brown", "Dave Jones"], 1)]
+    for room in rooms:
+        tables["rooms"].put_item(Item=tenant_item("rooms", TENANT, room))
+    for person in staff:
+        tables["staff"].put_item(Item=tenant_item("staff", TENANT, person))
+    return tables
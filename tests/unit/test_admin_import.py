@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+
+import admin_io
+from tenancy import tenant_item
+from tests.unit.conftest import TENANT
+
+
+@pytest.fixture
+def import_from(tables, monkeypatch):
+    """Run admin_io.import_table over the local tables, reading `records` instead of an S3 object."""
+    by_name = {table.table_name: table for table in tables.values()}
+    dynamodb = SimpleNamespace(Table=lambda name: by_name[name])
+    monkeypatch.setattr(admin_io, "boto3", SimpleNamespace(
+        resource=lambda service: dynamodb,
+        session=SimpleNamespace(Session=lambda: SimpleNamespace(resource=lambda service: dynamodb))
+    ))
+
+    def run(alias, records, **kwargs):
+        monkeypatch.setattr(admin_io, "read_records", lambda bucket, key, fmt: iter(records))
+        return admin_io.import_table(alias, "bucket", "key", tenant=TENANT, **kwargs)
+    return run
+
+
+def test_only_new_and_changed_records_are_written(office, import_from):
+    office["rooms"].put_item(Item=tenant_item("rooms", "globex", {"room_id": "1", "room_name": "Globex Huddle"}))
+    records = [
+        {"room_id": "1", "room_name": "Huddle", "capacity": 4, "building": "HQ", "floor": 1,
+         "equipment": ["whiteboard"]},
+        {"room_id": "2", "room_name": "Board Room", "capacity": 14, "building": "HQ", "floor": 2,
+         "equipment": ["projector", "video conferencing"]},
+        {"room_id": "4", "room_name": "Loft", "capacity": 6},
+    ]
+
+    result = import_from("rooms", records)
+
+    assert (result["read"], result["written"], result["unchanged"], result["deleted"]) == (3, 2, 1, 0)
+    assert office["rooms"].get_item(Key={"room_id": "acme#2"})["Item"]["capacity"] == 14
+    assert office["rooms"].get_item(Key={"room_id": "acme#4"})["Item"]["tenant_id"] == TENANT
+    assert office["rooms"].get_item(Key={"room_id": "globex#1"})["Item"]["room_name"] == "Globex Huddle"
+
+
+def test_delete_missing_only_removes_the_tenants_own_records(office, import_from):
+    office["staff"].put_item(Item=tenant_item("staff", "globex", {"staff_id": "9", "full_name": "Eve Adams"}))
+
+    result = import_from("staff", [{"staff_id": "1", "full_name": "Alice Johnson"}], delete_missing=True)
+
+    assert (result["written"], result["unchanged"], result["deleted"]) == (0, 1, 3)
+    assert sorted(office["staff"].items) == [("acme#1",), ("globex#9",)]
+
+
+def test_bookings_are_diffed_against_a_filtered_scan(tables, import_from):
+    booking = {"id": "1", "room_id": "1", "date": "2030-01-07", "start_time": "10:00", "end_time": "11:00",
+               "attendees": ["1"]}
+    tables["bookings"].put_item(Item=tenant_item("bookings", TENANT, booking))
+    tables["bookings"].put_item(Item=tenant_item("bookings", "globex", booking))
+
+    result = import_from("bookings", [booking, dict(booking, id="2", start_time="12:00", end_time="13:00")],
+                         delete_missing=True)
+
+    assert (result["written"], result["unchanged"], result["deleted"]) == (1, 1, 0)
+    assert sorted(tables["bookings"].items) == [("acme#1",), ("acme#2",), ("globex#1",)]
+
+
+def test_record_without_its_key_is_rejected(office, import_from):
+    with pytest.raises(ValueError, match="missing key 'room_id'"):
+        import_from("rooms", [{"room_name": "Nameless"}])
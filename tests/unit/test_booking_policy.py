@@ -0,0 +1,128 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+import booking_policy  # noqa: E402
+from booking_policy import BookingPolicy  # noqa: E402
+
+TENANT = "default"
+
+
+def days_from_today(days):
+    # The policy's "today" is UTC plus utc_offset_minutes (0 by default)
+    return (datetime.utcnow().date() + timedelta(days=days)).isoformat()
+
+
+def next_weekday(weekday):
+    today = datetime.utcnow().date()
+    return (today + timedelta(days=(weekday - today.weekday()) % 7 or 7)).isoformat()
+
+
+def test_default_policy_accepts_meeting_within_hours():
+    assert BookingPolicy().check(TENANT, days_from_today(1), "09:00", 60) is None
+
+
+def test_opening_hours():
+    policy = BookingPolicy({"open": "08:00", "close": "18:00"})
+    day = days_from_today(1)
+    assert policy.check(TENANT, day, "07:30", 30) == "Meetings must be between 08:00 and 18:00."
+    assert policy.check(TENANT, day, "17:45", 30) == "Meetings must be between 08:00 and 18:00."
+    assert policy.check(TENANT, day, "08:00", 30) is None
+    assert policy.check(TENANT, day, "17:30", 30) is None
+
+
+def test_min_and_max_duration():
+    policy = BookingPolicy({"min_duration": 15, "max_duration": 120})
+    day = days_from_today(1)
+    message = "Meetings must last between 15 and 120 minutes."
+    assert policy.check(TENANT, day, "09:00", 10) == message
+    assert policy.check(TENANT, day, "09:00", 121) == message
+    assert policy.check(TENANT, day, "09:00", 15) is None
+    assert policy.check(TENANT, day, "09:00", 120) is None
+
+
+def test_past_dates_rejected():
+    assert BookingPolicy().check(TENANT, days_from_today(-1), "09:00", 30) == "Meetings cannot be booked in the past."
+
+
+def test_days_ahead():
+    policy = BookingPolicy({"max_days_ahead": 30})
+    assert policy.check(TENANT, days_from_today(30), "09:00", 30) is None
+    assert policy.check(TENANT, days_from_today(31), "09:00", 30) == "Meetings can be booked at most 30 days ahead."
+
+
+def test_weekdays_only():
+    policy = BookingPolicy({"weekdays_only": True})
+    assert policy.check(TENANT, next_weekday(5), "09:00", 30) == "Meetings can only be booked on weekdays."
+    assert policy.check(TENANT, next_weekday(0), "09:00", 30) is None
+
+
+def test_malformed_date_or_time():
+    message = "Please give the date as YYYY-MM-DD and the time as HH:MM."
+    assert BookingPolicy().check(TENANT, "tomorrow", "09:00", 30) == message
+    assert BookingPolicy().check(TENANT, days_from_today(1), None, 30) == message
+
+
+def test_room_overrides_apply_only_to_that_room():
+    policy = BookingPolicy({"max_duration": 240, "rooms": {"5": {"close": "17:00", "max_duration": 60}}})
+    day = days_from_today(1)
+    assert policy.has_room_rules(TENANT, "5") and not policy.has_room_rules(TENANT, "1")
+    assert policy.check(TENANT, day, "09:00", 90, "5") == "Meetings must last between 15 and 60 minutes."
+    assert policy.check(TENANT, day, "16:30", 60, "5") == "Meetings must be between 07:00 and 17:00."
+    assert policy.check(TENANT, day, "09:00", 90, "1") is None
+    assert policy.check(TENANT, day, "09:00", 90) is None
+
+
+def test_buffers():
+    policy = BookingPolicy({"buffer": 10, "rooms": {"5": {"buffer": 30}}})
+    assert policy.office(TENANT).buffer() == 10
+    assert policy.office(TENANT).buffer("5") == 30
+    assert policy.office(TENANT).max_buffer == 30
+    assert policy.buffered_window(TENANT, "10:00", 60) == ("09:30", 120)
+    assert policy.buffered_window(TENANT, "10:00", 60, "1") == ("09:50", 80)
+    assert policy.buffered_window(TENANT, "10:00", 60, "5") == ("09:30", 120)
+
+
+def test_buffered_window_is_clamped_to_the_day():
+    policy = BookingPolicy({"buffer": 30})
+    assert policy.buffered_window(TENANT, "00:10", 30, "1") == ("00:00", 70)
+    assert policy.buffered_window(TENANT, "23:00", 45, "1") == ("22:30", 89)
+
+
+def test_room_overrides_are_per_office():
+    policy = BookingPolicy({
+        "rooms": {"5": {"max_duration": 60}},
+        "tenants": {"acme": {"rooms": {"5": {"close": "17:00"}}}}
+    }, default_tenant=TENANT)
+    day = days_from_today(1)
+    # Top-level rooms belong to the default office only
+    assert policy.check(TENANT, day, "09:00", 90, "5") == "Meetings must last between 15 and 60 minutes."
+    assert policy.check("acme", day, "09:00", 90, "5") is None
+    assert policy.check("acme", day, "16:30", 60, "5") == "Meetings must be between 07:00 and 17:00."
+    assert policy.check("globex", day, "09:00", 90, "5") is None
+    assert policy.check("globex", day, "16:30", 60, "5") is None
+
+
+def test_office_overrides():
+    policy = BookingPolicy({"buffer": 10, "tenants": {"acme": {"open": "06:00", "buffer": 0}}})
+    assert policy.check("acme", days_from_today(1), "06:30", 30) is None
+    assert policy.check("globex", days_from_today(1), "06:30", 30) == "Meetings must be between 07:00 and 20:00."
+    assert policy.buffered_window("acme", "10:00", 60) == ("10:00", 60)
+    assert policy.buffered_window("globex", "10:00", 60) == ("09:50", 80)
+
+
+def test_office_time_zone(monkeypatch):
+    class FixedDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime(2030, 1, 7, 23, 0)
+
+    monkeypatch.setattr(booking_policy, "datetime", FixedDatetime)
+    policy = BookingPolicy({"tenants": {"tokyo": {"utc_offset_minutes": 9 * 60}}})
+    # 23:00 UTC on the 7th is 08:00 on the 8th in Tokyo
+    assert policy.check("globex", "2030-01-08", "07:30", 30) is None
+    assert policy.check("tokyo", "2030-01-08", "07:30", 30) == "Meetings cannot be booked in the past."
+    assert policy.check("tokyo", "2030-01-08", "09:00", 30) is None
+    assert policy.check("tokyo", "2030-01-07", "10:00", 30) == "Meetings cannot be booked in the past."
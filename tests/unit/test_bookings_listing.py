@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+import unified_lambda
+from tenancy import tenant_item
+from tests.unit.conftest import TENANT, days_from_today
+
+
+def add_booking(tables, tenant, booking_id, date, room_id="1"):
+    tables["bookings"].put_item(Item=tenant_item("bookings", tenant, {
+        "id": booking_id, "room_id": room_id, "date": date,
+        "start_time": "10:00", "end_time": "11:00", "attendees": ["1"]
+    }))
+
+
+def get_bookings(query=None, accept=None):
+    headers = {"Accept": accept} if accept else {}
+    response = unified_lambda.bookings_response(TENANT, {"headers": headers, "queryStringParameters": query})
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_lists_the_next_days_by_default(office, monkeypatch):
+    monkeypatch.setattr(unified_lambda, "LIST_DAYS", 3)
+    add_booking(office, TENANT, "yesterday", days_from_today(-1))
+    add_booking(office, TENANT, "today", days_from_today(0))
+    add_booking(office, TENANT, "in-two-days", days_from_today(2))
+    add_booking(office, TENANT, "in-three-days", days_from_today(3))
+    add_booking(office, "globex", "other-office", days_from_today(0))
+
+    status, items = get_bookings()
+
+    assert status == 200
+    assert [b["id"] for b in items] == ["acme#today", "acme#in-two-days"]
+
+
+def test_lists_a_requested_range_with_projection(office):
+    add_booking(office, TENANT, "past", days_from_today(-5))
+    add_booking(office, TENANT, "today", days_from_today(0))
+
+    status, items = get_bookings({"from": days_from_today(-7), "to": days_from_today(-1), "fields": "id,date"})
+
+    assert status == 200
+    assert items == [{"id": "acme#past", "date": days_from_today(-5)}]
+
+
+def test_includes_sharded_room_partitions(office):
+    office["rooms"].put_item(Item=tenant_item("rooms", TENANT, {
+        "room_id": "9", "room_name": "Atrium", "capacity": 40, "write_shards": 4
+    }))
+    day = days_from_today(1)
+    booking = tenant_item("bookings", TENANT, {
+        "id": "sharded", "room_id": "9", "date": day, "start_time": "10:00", "end_time": "11:00", "attendees": []
+    })
+    booking["tenant_date"] = unified_lambda.write_partition(TENANT, day, "9")
+    office["bookings"].put_item(Item=booking)
+
+    status, items = get_bookings({"from": day, "to": day})
+
+    assert [b["id"] for b in items] == ["acme#sharded"]
+
+
+@pytest.mark.parametrize("query", [
+    {"from": "tomorrow"},
+    {"from": days_from_today(3), "to": days_from_today(1)},
+    {"from": days_from_today(0), "to": days_from_today(62)},
+])
+def test_rejects_bad_ranges(office, query):
+    status, body = get_bookings(query)
+    assert status == 400
+    assert "error" in body
+
+
+def test_msgpack_only_request_is_refused_without_msgpack(office, monkeypatch):
+    monkeypatch.setattr(unified_lambda, "msgpack", None)
+    add_booking(office, TENANT, "today", days_from_today(0))
+
+    status, body = get_bookings(accept="application/msgpack")
+    assert status == 406
+    assert "application/json" in body["error"]
+
+    status, items = get_bookings(accept="application/msgpack, application/json;q=0.5")
+    assert status == 200
+    assert [b["id"] for b in items] == ["acme#today"]
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import time
+
+import pytest
+
+import unified_lambda
+from tests.unit.conftest import TENANT, days_from_today
+
+KEY = f"{TENANT}#http#key"
+
+
+def confirm(booking_id):
+    return f"Booking confirmed as {booking_id}."
+
+
+def test_first_call_claims_the_key_and_records_the_confirmation(tables):
+    message, replayed = unified_lambda.run_idempotent(KEY, confirm, "hash")
+
+    assert not replayed
+    record = tables["dedup"].get_item(Key={"idempotency_key": KEY})["Item"]
+    assert (record["status"], record["response"], record["request_hash"]) == ("COMPLETED", message, "hash")
+
+
+def test_retry_replays_the_confirmation_without_running_again(tables):
+    first, _ = unified_lambda.run_idempotent(KEY, confirm, "hash")
+
+    def fail(booking_id):
+        raise AssertionError("ran twice")
+
+    assert unified_lambda.run_idempotent(KEY, fail, "hash") == (first, True)
+
+
+def test_retry_while_in_progress_is_told_to_wait(tables):
+    tables["dedup"].put_item(Item={"idempotency_key": KEY, "status": "IN_PROGRESS", "request_hash": "hash",
+                                   "expires_at": int(time.time()) + 60})
+
+    message, replayed = unified_lambda.run_idempotent(KEY, confirm, "hash")
+
+    assert replayed
+    assert message == "Your booking request is already being processed."
+
+
+def test_expired_claim_is_taken_over(tables):
+    tables["dedup"].put_item(Item={"idempotency_key": KEY, "status": "IN_PROGRESS", "request_hash": "hash",
+                                   "expires_at": int(time.time()) - 1})
+
+    message, replayed = unified_lambda.run_idempotent(KEY, confirm, "hash")
+
+    assert not replayed
+    assert message.startswith("Booking confirmed")
+
+
+@pytest.mark.parametrize("outcome", ["rejected", "error"])
+def test_failed_or_rejected_requests_release_the_key(tables, outcome):
+    def action(booking_id):
+        if outcome == "error":
+            raise RuntimeError("table unavailable")
+        return "Room already booked."
+
+    if outcome == "error":
+        with pytest.raises(RuntimeError):
+            unified_lambda.run_idempotent(KEY, action, "hash")
+    else:
+        unified_lambda.run_idempotent(KEY, action, "hash")
+
+    assert tables["dedup"].items == {}
+    assert unified_lambda.run_idempotent(KEY, confirm, "hash")[1] is False
+
+
+def test_key_reused_for_a_different_request_is_rejected(tables):
+    unified_lambda.run_idempotent(KEY, confirm, "hash")
+
+    with pytest.raises(unified_lambda.IdempotencyKeyReused):
+        unified_lambda.run_idempotent(KEY, confirm, "other-hash")
+
+
+def post_book(body, key):
+    event = {"httpMethod": "POST", "path": "/book", "headers": {"Idempotency-Key": key}, "body": json.dumps(body)}
+    response = unified_lambda.lambda_handler(event, None)
+    return response["statusCode"], response["headers"]["Idempotent-Replayed"], json.loads(response["body"])
+
+
+def test_post_book_hashes_the_header_and_checks_the_body(office, monkeypatch):
+    monkeypatch.setattr(unified_lambda, "tenant_from_http", lambda event: TENANT)
+    body = {"room": "Huddle", "date": days_from_today(2), "start_time": "10:00", "duration": 60,
+            "attendees": ["Alice Johnson"]}
+
+    assert post_book(body, "x" * 500)[:2] == (200, "false")
+    # Same request, keys in another order: a replay
+    assert post_book(dict(reversed(list(body.items()))), "x" * 500)[:2] == (200, "true")
+    status, _, response = post_book(dict(body, start_time="11:00"), "x" * 500)
+
+    assert status == 422
+    assert "different booking request" in response["message"]
+    (stored,) = office["dedup"].items.values()
+    assert stored["idempotency_key"] == f"{TENANT}#http#" + hashlib.sha256(b"x" * 500).hexdigest()
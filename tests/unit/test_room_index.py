@@ -0,0 +1,47 @@
+import pytest
+
+from unified_lambda import RoomIndex
+
+ROOMS = [
+    {"room_id": "acme#1", "room_name": "Huddle", "capacity": 4, "building": "HQ", "floor": 1,
+     "equipment": ["Whiteboard"]},
+    {"room_id": "acme#2", "room_name": "Board Room", "capacity": 12, "building": "HQ", "floor": 2,
+     "equipment": ["projector", "video conferencing"]},
+    {"room_id": "acme#3", "room_name": "Annex", "capacity": 8, "building": "Annex", "floor": 1,
+     "equipment": ["projector"]},
+    {"room_id": "acme#4", "room_name": "Phone Booth", "capacity": 1},
+    {"room_id": "acme#5", "room_name": "Studio", "capacity": 8, "building": "HQ", "floor": 2,
+     "equipment": ["projector", "whiteboard"], "write_shards": 4},
+]
+
+
+@pytest.fixture
+def index():
+    return RoomIndex(ROOMS)
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({}, ["4", "1", "3", "5", "2"]),
+    ({"min_capacity": 5}, ["3", "5", "2"]),
+    ({"min_capacity": 13}, []),
+    ({"equipment": ["projector"]}, ["3", "5", "2"]),
+    ({"equipment": ["Video-Conferencing", "PROJECTOR"]}, ["2"]),
+    ({"equipment": ["whiteboard"], "min_capacity": 2}, ["1", "5"]),
+    ({"equipment": ["hologram"]}, []),
+    ({"building": "hq", "floor": "2"}, ["5", "2"]),
+    ({"building": "annex"}, ["3"]),
+    ({"floor": 1, "min_capacity": 2}, ["1", "3"]),
+])
+def test_candidates_smallest_first(index, filters, expected):
+    assert index.candidates(**filters) == expected
+
+
+def test_rooms_are_keyed_by_local_id(index):
+    assert index.name_to_id["boardroom"] == "2"
+    assert index.capacity("2") == 12
+    assert index.write_shards == {"5": 4}
+
+
+def test_missing_equipment_keeps_the_requested_names(index):
+    assert index.missing_equipment("3", ["Projector", "Whiteboard", "Hologram"]) == ["Whiteboard", "Hologram"]
+    assert index.missing_equipment("4", []) == []
@@ -0,0 +1,94 @@
+import threading
+
+import unified_lambda as booking
+import waitlist_matcher
+from tests.unit.conftest import TENANT, days_from_today
+from tests.unit.test_waitlist_matcher import record, wait
+
+DAY = days_from_today(2)
+
+
+def room_bookings(tables, room_id):
+    return [b for b in tables["bookings"].items.values() if b["room_id"] == room_id and b["date"] == DAY]
+
+
+def test_concurrent_requests_for_a_room_book_it_once(office, monkeypatch):
+    # Every request passes the availability query, as when they all read before any writes
+    monkeypatch.setattr(booking, "check_availability", lambda *args: True)
+    results = []
+
+    def book(name):
+        results.append(booking.book_meeting(TENANT, "Huddle", DAY, "10:00", 60, [name], booking_id=name))
+
+    names = ["Alice Johnson", "Bob Smith", "Carol Brown", "Dave Jones"]
+    threads = [threading.Thread(target=book, args=(name,)) for name in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(room_bookings(office, "1")) == 1
+    assert sum(r.startswith("Booking confirmed") for r in results) == 1
+    assert len(office["waitlist"].items) == 3
+
+
+def test_overlapping_request_is_rejected_by_the_schedule(office, monkeypatch):
+    booking.book_meeting(TENANT, "Huddle", DAY, "10:00", 60, ["Alice Johnson"], booking_id="first")
+    monkeypatch.setattr(booking, "check_availability", lambda *args: True)
+
+    result = booking.book_meeting(TENANT, "Huddle", DAY, "10:30", 60, ["Bob Smith"], booking_id="second")
+
+    assert result.startswith("Room already booked")
+    assert [b["id"] for b in room_bookings(office, "1")] == ["acme#first"]
+    # Back-to-back bookings don't overlap
+    result = booking.book_meeting(TENANT, "Huddle", DAY, "11:00", 60, ["Bob Smith"], booking_id="third")
+    assert result.startswith("Booking confirmed")
+
+
+def test_auto_picked_room_taken_since_the_query_moves_to_the_next(office, monkeypatch):
+    booking.book_meeting(TENANT, "Huddle", DAY, "10:00", 60, ["Alice Johnson"], booking_id="first")
+    monkeypatch.setattr(booking, "booked_room_ids", lambda *args: set())
+
+    result = booking.book_meeting(TENANT, None, DAY, "10:00", 60, ["Bob Smith"], booking_id="second")
+
+    assert result.startswith("Booking confirmed for room Annex (3)")
+
+
+def test_cancelled_booking_is_released_for_waiters(office):
+    booking.book_meeting(TENANT, "Huddle", DAY, "10:00", 60, ["Alice Johnson"], booking_id="cancelled")
+    booking.book_meeting(TENANT, "Huddle", DAY, "10:00", 60, ["Bob Smith"], booking_id="waiting")
+    cancelled = office["bookings"].delete_item(Key={"id": "acme#cancelled"}, ReturnValues="ALL_OLD")["Attributes"]
+
+    result = waitlist_matcher.lambda_handler({"Records": [record("REMOVE", cancelled)]}, None)
+
+    assert result["promoted"] == 1
+    assert [b["id"] for b in room_bookings(office, "1")] == ["acme#waiting"]
+    _, schedule = booking.read_schedule(TENANT, "1", DAY)
+    assert schedule == {"acme#waiting": "10:00-11:00"}
+
+
+def test_shortened_booking_keeps_its_remaining_time(office):
+    booking.book_meeting(TENANT, "Huddle", DAY, "10:00", 120, ["Alice Johnson"], booking_id="shortened")
+    old = office["bookings"].get_item(Key={"id": "acme#shortened"})["Item"]
+    new = dict(old, end_time="11:00")
+    office["bookings"].put_item(Item=new)
+
+    waitlist_matcher.lambda_handler({"Records": [record("MODIFY", old, new)]}, None)
+
+    _, schedule = booking.read_schedule(TENANT, "1", DAY)
+    assert schedule == {"acme#shortened": "10:00-11:00"}
+
+
+def test_promotion_already_booked_by_a_retry_drops_the_waiter(office):
+    booking.book_meeting(TENANT, "Huddle", DAY, "14:00", 60, ["Alice Johnson"], booking_id="freed")
+    wait("1", "14:00", "15:00", "retried")
+    # The waiter's own request, retried later, booked another room at another time
+    booking.book_meeting(TENANT, "Annex", DAY, "09:00", 60, ["Bob Smith"], booking_id="retried")
+    cancelled = office["bookings"].delete_item(Key={"id": "acme#freed"}, ReturnValues="ALL_OLD")["Attributes"]
+
+    result = waitlist_matcher.lambda_handler({"Records": [record("REMOVE", cancelled)]}, None)
+
+    assert result["promoted"] == 0
+    assert office["waitlist"].items == {}
+    assert office["bookings"].get_item(Key={"id": "acme#retried"})["Item"]["room_id"] == "3"
+    assert booking.read_schedule(TENANT, "1", DAY)[1] == {}
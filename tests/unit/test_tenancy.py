@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+import pytest
+
+import tenancy
+from tenancy import LRUCache, TenantThrottle, tenant_from_http, tenant_from_lex, tenant_item
+
+
+def test_tenant_item_prefixes_keys_and_stamps_the_tenant():
+    room = tenant_item("rooms", "acme", {"room_id": "1", "room_name": "Huddle"})
+    assert room == {"room_id": "acme#1", "room_name": "Huddle", "tenant_id": "acme"}
+
+    # Keys already prefixed for another office are re-homed, not double-prefixed
+    booking = tenant_item("bookings", "globex", {"id": "acme#7", "date": "2030-01-07",
+                                                 "tenant_id": "acme", "tenant_date": "acme#2030-01-07#1.3"})
+    assert booking["id"] == "globex#7"
+    assert booking["tenant_id"] == "globex"
+    assert booking["tenant_date"] == "globex#2030-01-07"
+
+
+@pytest.mark.parametrize("tenant", ["Acme ", "acme-2", None])
+def test_validate_tenant_normalizes(tenant):
+    assert tenancy.validate_tenant(tenant) == (tenant or tenancy.DEFAULT_TENANT).strip().lower()
+
+
+@pytest.mark.parametrize("tenant", ["-acme", "ac#me", "a" * 41])
+def test_validate_tenant_rejects_bad_names(tenant):
+    with pytest.raises(ValueError):
+        tenancy.validate_tenant(tenant)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_lru_cache_is_bounded_by_size_but_keeps_the_newest_entry():
+    cache = LRUCache(10, max_bytes=100)
+    cache.put("a", 1, size=60)
+    cache.put("b", 2, size=30)
+    cache.put("a", 3, size=20)
+    assert cache.total_bytes == 50
+
+    cache.put("big", 4, size=500)
+
+    assert list(cache.entries) == ["big"]
+    assert cache.total_bytes == 500
+
+
+def test_throttle_refills_per_tenant(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(tenancy, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    throttle = TenantThrottle(rate=2, burst=3)
+
+    assert [throttle.allow("acme") for _ in range(4)] == [True, True, True, False]
+    # Another office has its own bucket
+    assert throttle.allow("globex")
+
+    clock[0] += 0.5
+    assert throttle.allow("acme")
+    assert not throttle.allow("acme")
+
+
+def test_throttle_disabled_with_zero_rate():
+    throttle = TenantThrottle(rate=0, burst=0)
+    assert all(throttle.allow("acme") for _ in range(100))
+
+
+def http_event(key_id=None):
+    return {"requestContext": {"identity": {"apiKeyId": key_id}}, "headers": {"x-tenant": "globex"}}
+
+
+def test_tenant_from_http_uses_the_api_key(monkeypatch):
+    monkeypatch.setattr(tenancy, "API_KEY_TENANTS", {"key-acme": "acme", "key-globex": "globex"})
+
+    assert tenant_from_http(http_event("key-acme")) == "acme"
+    for event in (http_event("unknown"), http_event(), {}):
+        with pytest.raises(PermissionError):
+            tenant_from_http(event)
+
+
+def test_tenant_from_http_without_keys_is_the_default_office(monkeypatch):
+    monkeypatch.setattr(tenancy, "API_KEY_TENANTS", {})
+    assert tenant_from_http(http_event("key-acme")) == tenancy.DEFAULT_TENANT
+
+
+@pytest.mark.parametrize("alias, tenant", [
+    ("acme", "acme"),
+    ("Prod", tenancy.DEFAULT_TENANT),
+    ("initech", tenancy.DEFAULT_TENANT),
+    (None, tenancy.DEFAULT_TENANT),
+])
+def test_tenant_from_lex_uses_the_bot_alias(alias, tenant):
+    # A tenant claimed by the caller is ignored
+    event = {"bot": {"aliasName": alias}, "sessionState": {"sessionAttributes": {"tenant": "globex"}}}
+    assert tenant_from_lex(event) == tenant
@@ -0,0 +1,151 @@
+import itertools
+
+from boto3.dynamodb.types import TypeSerializer
+
+import unified_lambda as booking
+import waitlist_matcher
+from booking_policy import BookingPolicy
+from tenancy import tenant_item
+from tests.unit.conftest import TENANT, days_from_today
+
+serializer = TypeSerializer()
+sequence_numbers = itertools.count(1)
+DAY = days_from_today(2)
+
+
+def add_booking(tables, booking_id, room_id, start_time, end_time, attendees=("1",), date=DAY):
+    item = tenant_item("bookings", TENANT, {
+        "id": booking_id, "room_id": room_id, "date": date,
+        "start_time": start_time, "end_time": end_time, "attendees": list(attendees)
+    })
+    tables["bookings"].put_item(Item=item)
+    return item
+
+
+def record(event_name, old, new=None):
+    change = {"SequenceNumber": str(next(sequence_numbers)),
+              "OldImage": {k: serializer.serialize(v) for k, v in old.items()}}
+    if new is not None:
+        change["NewImage"] = {k: serializer.serialize(v) for k, v in new.items()}
+    return {"eventName": event_name, "dynamodb": change}
+
+
+def cancel(tables, item):
+    tables["bookings"].delete_item(Key={"id": item["id"]})
+    return record("REMOVE", item)
+
+
+def wait(room_id, start_time, end_time, booking_id, attendees=("2",), priority=None):
+    booking.add_to_waitlist(TENANT, room_id, DAY, start_time, end_time, list(attendees),
+                            f"{TENANT}#{booking_id}", priority)
+
+
+def test_freed_slots_merges_records_for_a_room_date():
+    first = {"id": "acme#a", "tenant_id": TENANT, "room_id": "1", "date": DAY,
+             "start_time": "10:00", "end_time": "11:00"}
+    second = dict(first, id="acme#b", start_time="14:00", end_time="15:00")
+    other_room = dict(first, id="acme#c", room_id="2")
+    records = [record("REMOVE", first), record("REMOVE", second), record("REMOVE", other_room)]
+
+    slots = waitlist_matcher.freed_slots(records)
+
+    assert list(slots) == [(TENANT, "1", DAY), (TENANT, "2", DAY)]
+    assert slots[(TENANT, "1", DAY)] == [records[0]["dynamodb"]["SequenceNumber"], "10:00", "15:00",
+                                            ["acme#a", "acme#b"]]
+
+
+def test_freed_slots_ignores_unchanged_modifies_and_legacy_items():
+    old = {"id": "acme#a", "tenant_id": TENANT, "room_id": "1", "date": DAY,
+           "start_time": "10:00", "end_time": "11:00", "attendees": ["1"]}
+    legacy = {"id": "a", "room_id": "1", "date": DAY, "start_time": "10:00", "end_time": "11:00"}
+    records = [
+        record("MODIFY", old, dict(old, attendees=["1", "2"])),
+        record("REMOVE", legacy),
+        record("INSERT", old),
+    ]
+    assert waitlist_matcher.freed_slots(records) == {}
+
+    shortened = record("MODIFY", old, dict(old, end_time="10:30"))
+    assert waitlist_matcher.freed_slots([shortened]) == {
+        (TENANT, "1", DAY): [shortened["dynamodb"]["SequenceNumber"], "10:00", "11:00", ["acme#a"]]
+    }
+
+
+def test_waiter_for_the_freed_time_is_not_starved_by_earlier_waiters(office):
+    add_booking(office, "busy", "1", "10:00", "11:00", attendees=["3"])
+    freed = add_booking(office, "freed", "1", "14:00", "15:00", attendees=["3"])
+    # A long queue for the still-booked 10:00 slot ranks ahead of the 14:00 waiter
+    for n in range(30):
+        wait("1", "10:00", "11:00", f"early-{n}")
+    wait("1", "14:00", "15:00", "late", priority=booking.MAX_WAITLIST_PRIORITY)
+
+    result = waitlist_matcher.lambda_handler({"Records": [cancel(office, freed)]}, None)
+
+    assert result == {"batchItemFailures": [], "slots": 1, "promoted": 1}
+    promoted = office["bookings"].get_item(Key={"id": "acme#late"})["Item"]
+    assert (promoted["start_time"], promoted["end_time"], promoted["room_id"]) == ("14:00", "15:00", "1")
+
+
+def test_waiters_are_promoted_in_priority_order_without_conflicts(office):
+    freed = add_booking(office, "freed", "1", "10:00", "11:00")
+    wait("1", "10:00", "11:00", "queued-first")
+    wait("1", "10:30", "11:00", "high-priority", priority=0)
+    wait("1", "10:00", "10:30", "fits-before", attendees=["4"])
+
+    result = waitlist_matcher.lambda_handler({"Records": [cancel(office, freed)]}, None)
+
+    assert result["promoted"] == 2
+    assert "Item" in office["bookings"].get_item(Key={"id": "acme#high-priority"})
+    assert "Item" in office["bookings"].get_item(Key={"id": "acme#fits-before"})
+    # It overlaps both promoted bookings and stays queued
+    assert [w["booking_id"] for w in office["waitlist"].items.values()] == ["acme#queued-first"]
+
+
+def test_waiter_with_a_busy_attendee_is_skipped(office):
+    freed = add_booking(office, "freed", "1", "10:00", "11:00")
+    add_booking(office, "elsewhere", "2", "10:00", "11:00", attendees=["2"])
+    wait("1", "10:00", "11:00", "busy-attendee", attendees=["2"])
+    wait("1", "10:00", "11:00", "free-attendee", attendees=["4"])
+
+    result = waitlist_matcher.lambda_handler({"Records": [cancel(office, freed)]}, None)
+
+    assert result["promoted"] == 1
+    assert "Item" in office["bookings"].get_item(Key={"id": "acme#free-attendee"})
+
+
+def test_stopping_at_the_waiter_bound_reports_the_record(office, monkeypatch):
+    monkeypatch.setattr(waitlist_matcher, "WAITER_PAGE_SIZE", 2)
+    monkeypatch.setattr(waitlist_matcher, "MAX_WAITERS_PER_SLOT", 4)
+    freed = add_booking(office, "freed", "1", "10:00", "11:00")
+    add_booking(office, "elsewhere", "2", "10:00", "11:00", attendees=["2"])
+    for n in range(6):
+        wait("1", "10:00", "11:00", f"blocked-{n}", attendees=["2"])
+    remove = cancel(office, freed)
+
+    result = waitlist_matcher.lambda_handler({"Records": [remove]}, None)
+
+    assert result["batchItemFailures"] == [{"itemIdentifier": remove["dynamodb"]["SequenceNumber"]}]
+    assert result["slots"] == 0
+
+
+def test_room_dates_past_the_batch_cap_are_reported(office, monkeypatch):
+    monkeypatch.setattr(waitlist_matcher, "MAX_SLOTS_PER_BATCH", 1)
+    records = [cancel(office, add_booking(office, f"b{n}", str(n), "10:00", "11:00")) for n in (1, 2)]
+
+    result = waitlist_matcher.lambda_handler({"Records": records}, None)
+
+    assert result["batchItemFailures"] == [{"itemIdentifier": records[1]["dynamodb"]["SequenceNumber"]}]
+    assert result["slots"] == 1
+
+
+def test_promotions_apply_the_office_policy(office, monkeypatch):
+    monkeypatch.setattr(booking, "POLICY", BookingPolicy({"tenants": {TENANT: {"rooms": {"1": {"buffer": 30}}}}}))
+    add_booking(office, "busy", "1", "10:00", "11:00")
+    freed = add_booking(office, "freed", "1", "11:00", "12:30")
+    wait("1", "11:00", "12:00", "inside-buffer")
+    wait("1", "11:30", "12:30", "clear-of-buffer")
+
+    result = waitlist_matcher.lambda_handler({"Records": [cancel(office, freed)]}, None)
+
+    assert result["promoted"] == 1
+    assert "Item" in office["bookings"].get_item(Key={"id": "acme#clear-of-buffer"})